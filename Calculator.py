@@ -1,20 +1,15 @@
-import tkinter as tk
-from tkinter import messagebox
-import math
+import calc_core
 
-class Calculator:
-    def __init__(self, root):
+class Calculator(calc_core.CalculatorCore):
+    def __init__(self, root, cache_size=256, backend='auto', history_path=None):
+        import tkinter as tk
+        super(Calculator, self).__init__(cache_size, backend, history_path)
         self.root = root
         self.root.title("Advanced Calculator")
         self.root.geometry("600x800")
         self.root.resizable(False, False)
         self.root.configure(bg="#2d2d2d")
 
-        self.current = ""
-        self.previous = ""
-        self.op = ""
-        self.memory = 0
-        self.mode = 'rad'
         self.mode_button = None
 
         self.entry_var = tk.StringVar()
@@ -22,11 +17,13 @@ class Calculator:
                               width=18, borderwidth=4, relief='sunken', justify='right')
         self.entry.grid(row=0, column=0, columnspan=5, padx=10, pady=20)
 
-        self.create_buttons()
+        # The keypad is built once the window is up so it appears immediately
+        self.root.after_idle(self.create_buttons)
 
         self.root.bind('<Key>', self.key_press)
 
     def create_buttons(self):
+        import tkinter as tk
         buttons = [
             ('C', 1, 0, self.clear, "#d9534f"),
             ('←', 1, 1, self.backspace, "#f0ad4e"),
@@ -77,230 +74,23 @@ class Calculator:
             btn.grid(row=row, column=col, columnspan=span, padx=5, pady=5, sticky='we')
             if text == 'RAD':
                 self.mode_button = btn
+        self.show_mode()
 
-    def append(self, symbol):
-        if symbol == '.' and '.' in self.current:
-            return
-        self.current += symbol
-        self.entry_var.set(self.current)
+    def show(self, text):
+        self.display = text
+        self.entry_var.set(text)
 
-    def operation(self, op):
-        if self.current:
-            if self.previous and self.op:
-                self.calculate()
-            self.previous = self.current if not self.previous else self.previous
-            self.current = ""
-            self.op = op
-        self.entry_var.set(self.previous + " " + op + " ")
+    def show_error(self, message):
+        from tkinter import messagebox
+        self.last_error = message
+        messagebox.showerror("Error", message)
 
-    def calculate(self):
-        if not self.current or not self.op or not self.previous:
-            return
-        try:
-            prev = float(self.previous)
-            curr = float(self.current)
-            if self.op == '+':
-                result = prev + curr
-            elif self.op == '-':
-                result = prev - curr
-            elif self.op == '*':
-                result = prev * curr
-            elif self.op == '/':
-                if curr == 0:
-                    raise ZeroDivisionError
-                result = prev / curr
-            elif self.op == '**':
-                result = prev ** curr
-            self.entry_var.set(str(result))
-            self.previous = str(result)
-            self.current = ""
-            self.op = ""
-        except ZeroDivisionError:
-            messagebox.showerror("Error", "Division by zero is not allowed.")
-            self.clear()
-        except:
-            messagebox.showerror("Error", "Invalid expression.")
-            self.clear()
-
-    def clear(self):
-        self.current = ""
-        self.previous = ""
-        self.op = ""
-        self.entry_var.set("")
-
-    def backspace(self):
-        self.current = self.current[:-1]
-        self.entry_var.set(self.current)
-
-    def percent(self):
-        if not self.current:
-            return
-        try:
-            curr = float(self.current)
-            if self.op in ['+', '-']:
-                curr = float(self.previous) * (curr / 100)
-            else:
-                curr = curr / 100
-            self.current = str(curr)
-            self.entry_var.set(self.current)
-        except:
-            messagebox.showerror("Error", "Invalid percent operation.")
-
-    def toggle_mode(self):
-        if self.mode == 'rad':
-            self.mode = 'deg'
-            self.mode_button.config(text='DEG')
-        else:
-            self.mode = 'rad'
-            self.mode_button.config(text='RAD')
-
-    def get_trig(self, func, value):
-        try:
-            val = float(value)
-            if self.mode == 'deg':
-                val = math.radians(val)
-            return func(val)
-        except:
-            raise ValueError
-
-    def sin_func(self):
-        if self.current:
-            try:
-                result = self.get_trig(math.sin, self.current)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for sin.")
-
-    def cos_func(self):
-        if self.current:
-            try:
-                result = self.get_trig(math.cos, self.current)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for cos.")
-
-    def tan_func(self):
-        if self.current:
-            try:
-                result = self.get_trig(math.tan, self.current)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for tan.")
-
-    def log_func(self):
-        if self.current:
-            try:
-                val = float(self.current)
-                if val <= 0:
-                    raise ValueError
-                result = math.log10(val)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for log.")
-
-    def ln_func(self):
-        if self.current:
-            try:
-                val = float(self.current)
-                if val <= 0:
-                    raise ValueError
-                result = math.log(val)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for ln.")
-
-    def exp_func(self):
-        if self.current:
-            try:
-                val = float(self.current)
-                result = math.exp(val)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for exp.")
-
-    def sqrt_func(self):
-        if self.current:
-            try:
-                val = float(self.current)
-                if val < 0:
-                    raise ValueError
-                result = math.sqrt(val)
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except:
-                messagebox.showerror("Error", "Invalid input for sqrt.")
-
-    def one_over(self):
-        if self.current:
-            try:
-                val = float(self.current)
-                if val == 0:
-                    raise ZeroDivisionError
-                result = 1 / val
-                self.current = str(result)
-                self.entry_var.set(self.current)
-            except ZeroDivisionError:
-                messagebox.showerror("Error", "Division by zero is not allowed.")
-            except:
-                messagebox.showerror("Error", "Invalid input for 1/x.")
-
-    def pi_func(self):
-        self.current = str(math.pi)
-        self.entry_var.set(self.current)
-
-    def e_func(self):
-        self.current = str(math.e)
-        self.entry_var.set(self.current)
-
-    def memory_add(self):
-        if self.current:
-            try:
-                self.memory += float(self.current)
-            except:
-                pass
-
-    def memory_sub(self):
-        if self.current:
-            try:
-                self.memory -= float(self.current)
-            except:
-                pass
-
-    def memory_recall(self):
-        self.current = str(self.memory)
-        self.entry_var.set(self.current)
-
-    def memory_clear(self):
-        self.memory = 0
-
-    def memory_store(self):
-        if self.current:
-            try:
-                self.memory = float(self.current)
-            except:
-                pass
-
-    def key_press(self, event):
-        if event.char.isdigit() or event.char == '.':
-            self.append(event.char)
-        elif event.char in '+-*/^':
-            self.operation(event.char if event.char != '^' else '**')
-        elif event.char == '%':
-            self.percent()
-        elif event.keysym == 'Return' or event.char == '=':
-            self.calculate()
-        elif event.keysym == 'BackSpace':
-            self.backspace()
-        elif event.keysym == 'Escape':
-            self.clear()
+    def show_mode(self):
+        if self.mode_button is not None:
+            self.mode_button.config(text=self.mode.upper())
 
 if __name__ == "__main__":
+    import tkinter as tk
     root = tk.Tk()
     calc = Calculator(root)
     root.mainloop()
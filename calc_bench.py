@@ -0,0 +1,168 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+import calc_core
+import calc_engine
+
+KeyEvent = namedtuple('KeyEvent', 'char keysym')
+
+_KEYSYMS = {'\r': 'Return', '\b': 'BackSpace', '\x1b': 'Escape'}
+
+
+def key_stream(count, seed=0):
+    # Synthetic keypad sessions: digits, operators, %, = and the odd correction
+    rng = random.Random(seed)
+    keys = []
+    while len(keys) < count:
+        for _ in range(rng.randint(1, 4)):
+            keys.extend(rng.choice('123456789') for _ in range(rng.randint(1, 4)))
+            keys.append(rng.choice('+-*/^'))
+        keys.extend(rng.choice('123456789') for _ in range(rng.randint(1, 3)))
+        keys.append(rng.choice('\r\r\r%\b'))
+        if rng.random() < 0.2:
+            keys.append('\x1b')
+    return [KeyEvent(k, _KEYSYMS.get(k, k)) for k in keys[:count]]
+
+
+def expression_corpus(count, seed=0):
+    rng = random.Random(seed)
+    templates = [
+        "{a} + {b} * {c}",
+        "({a} - {b}) / {c}",
+        "sin({a}) ** 2 + cos({b}) ** 2",
+        "sqrt({a}) + log({b}) - ln({c})",
+        "{a} + {b}%",
+        "exp({a} / 100) * {b}",
+    ]
+    return [rng.choice(templates).format(a=rng.randint(1, 999), b=rng.randint(1, 99), c=rng.randint(1, 9))
+            for _ in range(count)]
+
+
+def measure(name, func, args, repeat=1):
+    # Per-call latency with perf_counter_ns, then a separate pass under
+    # tracemalloc (which slows every allocation) for the memory figures.
+    timings = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        for arg in args:
+            start = clock()
+            func(arg)
+            timings.append(clock() - start)
+    timings.sort()
+    total_ns = sum(timings)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peak_bytes = 0
+    for arg in args:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        func(arg)
+        peak_bytes += tracemalloc.get_traced_memory()[1] - current
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    return {
+        'name': name,
+        'calls': len(timings),
+        'ops_per_sec': len(timings) / (total_ns / 1e9) if total_ns else 0.0,
+        'p50_ns': timings[len(timings) // 2],
+        'p99_ns': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'alloc_bytes_per_op': peak_bytes / len(args),
+        'retained_blocks_per_op': retained / len(args),
+    }
+
+
+def run(size=20000, seed=0):
+    rng = random.Random(seed)
+    numbers = [str(rng.randint(1, 9999) / rng.choice((1, 10, 100))) for _ in range(size)]
+    results = []
+
+    calc = calc_core.CalculatorCore()
+
+    def append(symbol):
+        if len(calc.current) > 12:
+            calc.current = ""
+        calc.append(symbol)
+    results.append(measure('append', append, [rng.choice('0123456789.') for _ in range(size)]))
+
+    def operation(op):
+        calc.current = "12"
+        calc.previous = ""
+        calc.operation(op)
+    results.append(measure('operation', operation, [rng.choice('+-*/') for _ in range(size)]))
+
+    def calculate(args):
+        calc.previous, calc.op, calc.current = args
+        calc.calculate()
+    triples = [(a, rng.choice('+-*/'), b) for a, b in zip(numbers, reversed(numbers))]
+    results.append(measure('calculate', calculate, triples))
+    calc.cache.resize(0)
+    results.append(measure('calculate_uncached', calculate, triples))
+    calc.cache.resize(256)
+
+    def percent(args):
+        calc.previous, calc.op, calc.current = args
+        calc.percent()
+    results.append(measure('percent', percent, triples))
+
+    for name in ('sin_func', 'cos_func', 'tan_func', 'log_func', 'ln_func', 'exp_func', 'sqrt_func', 'one_over'):
+        method = getattr(calc, name)
+
+        def scientific(value, method=method):
+            calc.current = value
+            method()
+        results.append(measure(name, scientific, numbers))
+
+    keys_calc = calc_core.CalculatorCore()
+    results.append(measure('key_press', keys_calc.key_press, key_stream(size, seed)))
+
+    corpus = expression_corpus(size, seed)
+    results.append(measure('engine_evaluate', calc_engine.evaluate, corpus[:size // 10]))
+    evaluator = calc_engine.BatchEvaluator()
+    results.append(measure('batch_evaluate', evaluator.evaluate, corpus))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the calculator core.")
+    parser.add_argument('-n', '--size', type=int, default=20000, help="operations per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON file from an earlier run to compare ops/sec against")
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.seed)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {row['name']: row for row in json.load(f)['results']}
+    print(f"{'benchmark':22} {'ops/sec':>12} {'p50 ns':>9} {'p99 ns':>9} {'bytes/op':>9} {'kept/op':>8}")
+    for row in results:
+        print(f"{row['name']:22} {row['ops_per_sec']:12,.0f} {row['p50_ns']:9} {row['p99_ns']:9} "
+              f"{row['alloc_bytes_per_op']:9.0f} {row['retained_blocks_per_op']:8.2f}", end='')
+        old = baseline.get(row['name'])
+        if old and old['ops_per_sec']:
+            print(f" {100 * (row['ops_per_sec'] / old['ops_per_sec'] - 1):+7.1f}%", end='')
+        print()
+    if args.output:
+        report = {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'size': args.size,
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
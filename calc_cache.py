@@ -0,0 +1,77 @@
+import re
+from collections import OrderedDict
+
+_MISSING = object()
+# Whitespace between an operator and a number or name; whitespace between two
+# numbers or names separates tokens ("2 3" is not "23") and is kept
+_OPERATOR_SPACE_RE = re.compile(r'(?<=[\w.]) (?=[^\w.])|(?<=[^\w.]) (?=[\w.])')
+
+
+def normalize(text):
+    return _OPERATOR_SPACE_RE.sub('', ' '.join(text.split())).replace('^', '**')
+
+
+class LRUCache:
+    def __init__(self, maxsize=256):
+        if maxsize < 0:
+            raise ValueError("Cache size must not be negative.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._memory_keys = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, uses_memory=False):
+        if self.maxsize == 0:
+            return
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if uses_memory:
+            self._memory_keys.add(key)
+        while len(entries) > self.maxsize:
+            old_key, _ = entries.popitem(last=False)
+            self._memory_keys.discard(old_key)
+            self.evictions += 1
+
+    def invalidate_memory(self):
+        # Drop results that read the memory register; everything else stays valid
+        for key in self._memory_keys:
+            self._entries.pop(key, None)
+        self._memory_keys.clear()
+
+    def clear(self):
+        self._entries.clear()
+        self._memory_keys.clear()
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._entries) > maxsize:
+            old_key, _ = self._entries.popitem(last=False)
+            self._memory_keys.discard(old_key)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
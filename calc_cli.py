@@ -0,0 +1,66 @@
+import argparse
+import json
+import sys
+from itertools import islice
+import calc_engine
+
+
+def evaluate_stream(infile, outfile, mode='rad', chunk_size=8192):
+    evaluator = calc_engine.BatchEvaluator(mode)
+    format_line = evaluator.format_line
+    count = 0
+    while True:
+        chunk = list(islice(infile, chunk_size))
+        if not chunk:
+            break
+        outfile.write(''.join([format_line(line) for line in chunk]))
+        count += len(chunk)
+    return count
+
+
+def evaluate_stream_parallel(infile, outfile, mode='rad', workers=None, chunk_size=None, errfile=None):
+    import calc_parallel
+    buffer = []
+    count = 0
+    for item in calc_parallel.evaluate_parallel(infile, mode, workers, chunk_size):
+        buffer.append(calc_parallel.format_result(item))
+        if errfile is not None and isinstance(item, dict):
+            errfile.write(json.dumps(item) + '\n')
+        if len(buffer) >= 8192:
+            outfile.write(''.join(buffer))
+            buffer.clear()
+        count += 1
+    outfile.write(''.join(buffer))
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions, one per line.")
+    parser.add_argument('input', nargs='?', default='-', help="file to read (default: stdin)")
+    parser.add_argument('-o', '--output', default='-', help="file to write (default: stdout)")
+    parser.add_argument('-m', '--mode', choices=('rad', 'deg'), default='rad', help="angle mode for sin/cos/tan")
+    parser.add_argument('--chunk-size', type=int, help="lines read and written per batch "
+                                                       "(default: 8192, or adaptive with --workers)")
+    parser.add_argument('-j', '--workers', type=int, help="evaluate in a process pool (0 = one per core)")
+    parser.add_argument('--errors', help="with --workers, write error records as JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.input == '-' else open(args.input, 'r')
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    errfile = open(args.errors, 'w') if args.errors else None
+    try:
+        if args.workers is not None:
+            evaluate_stream_parallel(infile, outfile, args.mode, args.workers or None, args.chunk_size, errfile)
+        else:
+            evaluate_stream(infile, outfile, args.mode, args.chunk_size or 8192)
+    finally:
+        if errfile is not None:
+            errfile.close()
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import math
+import calc_cache
+import calc_engine
+import calc_history
+import calc_numeric
+
+
+class CalculatorCore:
+    # Keypad state machine without any GUI; Calculator.py adds the Tk window
+    # by overriding show, show_error and show_mode.
+    def __init__(self, cache_size=256, backend='auto', history_path=None):
+        self.current = ""
+        self.previous = ""
+        self.op = ""
+        self.memory = 0
+        self.mode = 'rad'
+        self.display = ""
+        self.last_error = None
+        self.cache = calc_cache.LRUCache(cache_size)
+        self.backend = calc_numeric.get_backend(backend)
+        self.history = calc_history.HistoryLog(history_path) if history_path else None
+
+    def show(self, text):
+        self.display = text
+
+    def show_error(self, message):
+        self.last_error = message
+
+    def show_mode(self):
+        pass
+
+    def append(self, symbol):
+        if symbol == '.' and '.' in self.current:
+            return
+        self.current += symbol
+        self.show(self.current)
+
+    def operation(self, op):
+        if self.current:
+            if self.previous and self.op:
+                self.calculate()
+            self.previous = self.current if not self.previous else self.previous
+            self.current = ""
+            self.op = op
+        self.show(self.previous + " " + op + " ")
+
+    def calculate(self):
+        if not self.current or not self.op or not self.previous:
+            return
+        try:
+            key = (self.previous, self.op, self.current, self.mode)
+            result = self.cache.get(key)
+            if result is None:
+                result = self.backend.calculate(self.previous, self.op, self.current)
+                self.cache.put(key, result)
+            text = self.backend.format(result)
+            if self.history is not None:
+                self.history.append(f"{self.previous} {self.op} {self.current}", text, self.mode)
+            self.show(text)
+            self.previous = text
+            self.current = ""
+            self.op = ""
+        except ZeroDivisionError:
+            self.show_error("Division by zero is not allowed.")
+            self.clear()
+        except:
+            self.show_error("Invalid expression.")
+            self.clear()
+
+    def evaluate_expression(self, expression):
+        try:
+            key = (calc_cache.normalize(expression), self.mode)
+            result = self.cache.get(key)
+            if result is None:
+                compiled = calc_engine.compile_expression(expression, self.mode)
+                variables = {'M': self.memory}
+                result = compiled.evaluate(variables)
+                result = calc_engine.backend_result(compiled.tree, result, self.backend, variables)
+                self.cache.put(key, result, uses_memory='M' in compiled.variables)
+            text = self.backend.format(result)
+            if self.history is not None:
+                self.history.append(expression, text, self.mode)
+            self.show(text)
+            self.previous = text
+            self.current = ""
+            self.op = ""
+            return result
+        except ZeroDivisionError:
+            self.show_error("Division by zero is not allowed.")
+            self.clear()
+        except:
+            self.show_error("Invalid expression.")
+            self.clear()
+
+    def evaluate_array(self, expression, values):
+        import calc_vector
+        return calc_vector.evaluate_array(expression, values, self.mode)
+
+    def set_backend(self, name):
+        self.backend = calc_numeric.get_backend(name)
+        self.cache.clear()
+
+    def recall_history(self, index):
+        if self.history.truncated(index):
+            self.show_error("That result was too long to keep and cannot be recalled.")
+            return None
+        expression, result, mode = self.history[index]
+        self.current = result
+        self.show(self.current)
+        return expression, result, mode
+
+    def clear(self):
+        self.current = ""
+        self.previous = ""
+        self.op = ""
+        self.show("")
+
+    def backspace(self):
+        self.current = self.current[:-1]
+        self.show(self.current)
+
+    def percent(self):
+        if not self.current:
+            return
+        try:
+            curr = float(self.current)
+            if self.op in ['+', '-']:
+                curr = float(self.backend.parse(self.previous)) * (curr / 100)
+            else:
+                curr = curr / 100
+            self.current = str(curr)
+            self.show(self.current)
+        except:
+            self.show_error("Invalid percent operation.")
+
+    def toggle_mode(self):
+        self.mode = 'deg' if self.mode == 'rad' else 'rad'
+        self.show_mode()
+
+    def get_trig(self, func, value):
+        # A plain tuple: building and normalizing a string cost more than
+        # the trig call the cache saves
+        key = (func, value, self.mode)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        try:
+            val = float(value)
+            if self.mode == 'deg':
+                val = math.radians(val)
+            result = func(val)
+        except:
+            raise ValueError
+        self.cache.put(key, result)
+        return result
+
+    def sin_func(self):
+        if self.current:
+            try:
+                result = self.get_trig(math.sin, self.current)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for sin.")
+
+    def cos_func(self):
+        if self.current:
+            try:
+                result = self.get_trig(math.cos, self.current)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for cos.")
+
+    def tan_func(self):
+        if self.current:
+            try:
+                result = self.get_trig(math.tan, self.current)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for tan.")
+
+    def log_func(self):
+        if self.current:
+            try:
+                val = float(self.current)
+                if val <= 0:
+                    raise ValueError
+                result = math.log10(val)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for log.")
+
+    def ln_func(self):
+        if self.current:
+            try:
+                val = float(self.current)
+                if val <= 0:
+                    raise ValueError
+                result = math.log(val)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for ln.")
+
+    def exp_func(self):
+        if self.current:
+            try:
+                val = float(self.current)
+                result = math.exp(val)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for exp.")
+
+    def sqrt_func(self):
+        if self.current:
+            try:
+                val = float(self.current)
+                if val < 0:
+                    raise ValueError
+                result = math.sqrt(val)
+                self.current = str(result)
+                self.show(self.current)
+            except:
+                self.show_error("Invalid input for sqrt.")
+
+    def one_over(self):
+        if self.current:
+            try:
+                val = float(self.current)
+                if val == 0:
+                    raise ZeroDivisionError
+                result = 1 / val
+                self.current = str(result)
+                self.show(self.current)
+            except ZeroDivisionError:
+                self.show_error("Division by zero is not allowed.")
+            except:
+                self.show_error("Invalid input for 1/x.")
+
+    def pi_func(self):
+        self.current = str(math.pi)
+        self.show(self.current)
+
+    def e_func(self):
+        self.current = str(math.e)
+        self.show(self.current)
+
+    def memory_add(self):
+        if self.current:
+            try:
+                self.memory += float(self.current)
+                self.cache.invalidate_memory()
+            except:
+                pass
+
+    def memory_sub(self):
+        if self.current:
+            try:
+                self.memory -= float(self.current)
+                self.cache.invalidate_memory()
+            except:
+                pass
+
+    def memory_recall(self):
+        self.current = str(self.memory)
+        self.show(self.current)
+
+    def memory_clear(self):
+        self.memory = 0
+        self.cache.invalidate_memory()
+
+    def memory_store(self):
+        if self.current:
+            try:
+                self.memory = float(self.current)
+                self.cache.invalidate_memory()
+            except:
+                pass
+
+    def key_press(self, event):
+        if event.char.isdigit() or event.char == '.':
+            self.append(event.char)
+        elif event.char in '+-*/^':
+            self.operation(event.char if event.char != '^' else '**')
+        elif event.char == '%':
+            self.percent()
+        elif event.keysym == 'Return' or event.char == '=':
+            self.calculate()
+        elif event.keysym == 'BackSpace':
+            self.backspace()
+        elif event.keysym == 'Escape':
+            self.clear()
@@ -0,0 +1,446 @@
+import decimal
+import math
+import re
+import calc_cache
+import calc_numeric
+
+CONSTANTS = {'pi': math.pi, 'e': math.e}
+FUNCTIONS = {
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'log': math.log10,
+    'ln': math.log,
+    'exp': math.exp,
+    'sqrt': math.sqrt,
+}
+TRIG_FUNCTIONS = ('sin', 'cos', 'tan')
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<op>\*\*|[-+*/^()%])
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<bad>\S)
+    )""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class FunctionError(ExpressionError):
+    # A function called outside its domain: log(0), sqrt(-1), exp(1000)
+    def __init__(self, name):
+        super().__init__(f"Invalid input for {name}.")
+        self.name = name
+
+
+def tokenize(text):
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind is None:
+            continue
+        value = match.group(kind)
+        if kind == 'bad':
+            raise ExpressionError(f"Unexpected character {value!r}")
+        if kind == 'num':
+            tokens.append(('num', float(value)))
+        elif kind == 'op':
+            tokens.append(('op', '**' if value == '^' else value))
+        else:
+            tokens.append(('name', value))
+    tokens.append(('end', None))
+    return tokens
+
+
+# Trees are plain tuples:
+#   ('num', value)  ('var', name)  ('neg', operand)
+#   ('bin', op, left, right)  ('call', name, argument)
+# A postfix percent is ('pct', operand) until the parser resolves it: as the
+# right operand of + or - it means that percentage of the left operand, like
+# the Calculator's % key; anywhere else it is operand / 100.
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        token = self.take()
+        if token != ('op', value):
+            raise ExpressionError(f"Expected {value!r}")
+
+    def parse(self):
+        tree = self.expr()
+        if self.peek()[0] != 'end':
+            raise ExpressionError("Unexpected input after expression")
+        if ('op', '%') in self.tokens:
+            tree = _lower_percent(tree)
+        return tree
+
+    def expr(self):
+        left = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = self.take()[1]
+            right = self.term()
+            if right[0] == 'pct':
+                right = ('bin', '*', left, ('bin', '/', right[1], ('num', 100.0)))
+            left = ('bin', op, left, right)
+        return left
+
+    def term(self):
+        left = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.take()[1]
+            left = ('bin', op, left, self.unary())
+        return left
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            return ('neg', self.unary())
+        if self.peek() == ('op', '+'):
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        base = self.postfix()
+        if self.peek() == ('op', '**'):
+            self.take()
+            return ('bin', '**', base, self.unary())
+        return base
+
+    def postfix(self):
+        node = self.primary()
+        while self.peek() == ('op', '%'):
+            self.take()
+            node = ('pct', node)
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'name':
+            if value in FUNCTIONS:
+                self.expect('(')
+                argument = self.expr()
+                self.expect(')')
+                return ('call', value, argument)
+            if value in CONSTANTS:
+                return ('num', CONSTANTS[value])
+            return ('var', value)
+        if (kind, value) == ('op', '('):
+            inner = self.expr()
+            self.expect(')')
+            return inner
+        raise ExpressionError("Incomplete expression" if kind == 'end' else f"Unexpected {value!r}")
+
+
+def _lower_percent(node):
+    kind = node[0]
+    if kind == 'pct':
+        return ('bin', '/', _lower_percent(node[1]), ('num', 100.0))
+    if kind == 'neg':
+        return ('neg', _lower_percent(node[1]))
+    if kind == 'bin':
+        return ('bin', node[1], _lower_percent(node[2]), _lower_percent(node[3]))
+    if kind == 'call':
+        return ('call', node[1], _lower_percent(node[2]))
+    return node
+
+
+def parse(text):
+    return _Parser(tokenize(text)).parse()
+
+
+def variables_of(tree):
+    names = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node[0] == 'var':
+            names.add(node[1])
+        elif node[0] != 'num':
+            stack.extend(node[2:] if node[0] in ('bin', 'call') else node[1:])
+    return sorted(names)
+
+
+def _source(node, mode, child=None):
+    # `child` renders sub-trees; the optimizer swaps it to share common ones
+    if child is None:
+        child = lambda sub: _source(sub, mode)
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        if math.isfinite(value):
+            return repr(value)
+        # repr gives inf/nan, which are not names in the lambda's namespace
+        if value != value:
+            return '_nan'
+        return '_inf' if value > 0 else '(-_inf)'
+    if kind == 'var':
+        return 'v_' + node[1]
+    if kind == 'neg':
+        return f"(-{child(node[1])})"
+    if kind == 'bin':
+        op, left, right = node[1], child(node[2]), child(node[3])
+        if op == '**':
+            return f"_pow({left}, {right})"
+        return f"({left} {op} {right})"
+    name, argument = node[1], child(node[2])
+    if mode == 'deg' and name in TRIG_FUNCTIONS:
+        argument = f"_radians({argument})"
+    return f"_{name}({argument})"
+
+
+_NAMESPACE = {'__builtins__': {}, '_pow': math.pow, '_radians': math.radians, '_inf': math.inf, '_nan': math.nan}
+_NAMESPACE.update({'_' + name: func for name, func in FUNCTIONS.items()})
+
+
+def _checked(name, func):
+    def call(value):
+        try:
+            return func(value)
+        except (ValueError, OverflowError):
+            raise FunctionError(name) from None
+    return call
+
+
+# Only used to rerun a failed line and name the function that failed
+_CHECKED_NAMESPACE = dict(_NAMESPACE)
+_CHECKED_NAMESPACE.update({'_' + name: _checked(name, func) for name, func in FUNCTIONS.items()})
+
+
+class CompiledExpression:
+    __slots__ = ('text', 'mode', 'tree', 'variables', 'function')
+
+    def __init__(self, text, tree, mode='rad', source=None):
+        self.text = text
+        self.mode = mode
+        self.tree = tree
+        self.variables = variables_of(tree)
+        params = ', '.join('v_' + name for name in self.variables)
+        if source is None:
+            source = _source(tree, mode)
+        self.function = eval(f"lambda {params}: {source}", dict(_NAMESPACE))
+
+    def __call__(self, *args):
+        return self.function(*args)
+
+    def evaluate(self, variables=None):
+        if not self.variables:
+            return self.function()
+        try:
+            args = [variables[name] for name in self.variables]
+        except (KeyError, TypeError):
+            missing = [name for name in self.variables if not variables or name not in variables]
+            raise ExpressionError(f"Unknown name {missing[0]!r}") from None
+        return self.function(*args)
+
+
+def compile_expression(text, mode='rad', optimize=False):
+    if optimize:
+        import calc_optimize
+        return calc_optimize.compile_optimized(text, mode)
+    return CompiledExpression(text, parse(text), mode)
+
+
+def evaluate(text, mode='rad', variables=None):
+    return compile_expression(text, mode).evaluate(variables)
+
+
+def error_message(exc):
+    if isinstance(exc, ZeroDivisionError):
+        return "Division by zero is not allowed."
+    if isinstance(exc, FunctionError):
+        return str(exc)
+    return "Invalid expression."
+
+
+_FORMAT = calc_numeric.AutoBackend()
+
+
+def format_value(value):
+    # As the Calculator shows a result of its auto backend
+    return _FORMAT.format(value)
+
+
+def _is_exact_shape(tree):
+    # Only + - * of literals, which the decimal backend computes exactly
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == 'bin' and node[1] in ('+', '-', '*'):
+            stack.extend(node[2:])
+        elif kind == 'neg':
+            stack.append(node[1])
+        elif kind not in ('num', 'var'):
+            return False
+    return True
+
+
+
+def _backend_value(node, backend, variables):
+    kind = node[0]
+    if kind == 'num':
+        return backend.parse(repr(node[1]))
+    if kind == 'var':
+        return backend.parse(repr(variables[node[1]]))
+    if kind == 'neg':
+        return -_backend_value(node[1], backend, variables)
+    return backend.calculate(_backend_value(node[2], backend, variables), node[1],
+                             _backend_value(node[3], backend, variables))
+
+
+def backend_result(tree, result, backend, variables=None):
+    # The float `result` of tree as CalculatorCore.calculate would give it:
+    # + - * trees are redone in the backend's numbers, and the auto backend
+    # keeps the float unless it differs from the exact value.
+    if backend.name == 'float' or not math.isfinite(result) or not _is_exact_shape(tree):
+        return result
+    if backend.name != 'auto':
+        return _backend_value(tree, backend, variables)
+    exact = backend.exact
+    # As in AutoBackend, inputs already too long for floats stay floats
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node[0] in ('num', 'var'):
+            value = node[1] if node[0] == 'num' else variables[node[1]]
+            if calc_numeric.significant_digits(repr(value)) > backend.max_digits:
+                return result
+        else:
+            stack.extend(node[1:] if node[0] == 'neg' else node[2:])
+    value = _backend_value(tree, exact, variables)
+    if value == exact.parse(repr(result)):
+        return result
+    backend.escalations += 1
+    return value
+
+# Numeric literals are lifted out of each line so that lines differing only in
+# their numbers share one compiled function ("shape"). Single-digit exponents
+# stay in the shape, where the optimizer can use them (x ** 2, x ** 0), and a
+# literal repeated in a line is lifted once, so sin(3)**2 + cos(3)**2 still
+# simplifies and repeated sub-expressions stay common.
+_KEPT_EXPONENT = r'(?:(?<=\*\*)|(?<=\*\* )|(?<=\^)|(?<=\^ ))\d(?![\w.])'
+_LITERAL_RE = re.compile(rf'(?=[\d.])(?<![\w.])(?!{_KEPT_EXPONENT})((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_PARAM_RE = re.compile(r'#(\d*)')
+
+
+def _share_literals(parts):
+    # Shape and distinct literals of a split line; '#k' is the k-th literal
+    index = {}
+    pieces = [parts[0]]
+    for literal, piece in zip(parts[1::2], parts[2::2]):
+        pieces.append(f"#{index.setdefault(literal, len(index))}{piece}")
+    return ''.join(pieces), list(index)
+
+
+class BatchEvaluator:
+    # Results match CalculatorCore with the auto backend: + - * lines whose
+    # float result was rounded are recomputed in decimal (0.1+0.2 gives 0.3),
+    # and a function outside its domain is named in the error.
+    def __init__(self, mode='rad', cache_size=4096):
+        self.mode = mode
+        self.shapes = calc_cache.LRUCache(cache_size)
+        self.backend = calc_numeric.AutoBackend()
+
+    def compile_shape(self, shape):
+        # '#' takes the next literal in order, '#k' literal k
+        parts = _PARAM_RE.split(shape)
+        refs = parts[1::2]
+        indices = [int(ref) for ref in refs] if refs and refs[0] else range(len(refs))
+        text = parts[0]
+        for i, part in zip(indices, parts[2::2]):
+            text += f"_{i}" + part
+        tree = parse(text)
+        names = set(variables_of(tree))
+        params = [f"_{i}" for i in range(max(indices, default=-1) + 1)]
+        if names - set(params):
+            raise ExpressionError(f"Unknown name {sorted(names - set(params))[0]!r}")
+        exact = _is_exact_shape(tree)
+        import calc_optimize
+        tree = calc_optimize.optimize(tree, self.mode)
+        body = calc_optimize.cse_source(tree, self.mode)
+        source = f"lambda {', '.join('v_' + name for name in params)}: {body}"
+        return eval(source, dict(_NAMESPACE)), source, exact
+
+    def evaluate(self, text):
+        parts = _LITERAL_RE.split(text)
+        literals = parts[1::2]
+        if len(set(literals)) == len(literals):
+            shape = '#'.join(parts[::2])
+        else:
+            shape, literals = _share_literals(parts)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            entry = self.compile_shape(shape)
+            self.shapes.put(shape, entry)
+        function, source, exact = entry
+        try:
+            result = function(*map(float, literals))
+        except (ValueError, OverflowError):
+            eval(source, dict(_CHECKED_NAMESPACE))(*map(float, literals))
+            raise
+        if exact:
+            return self._exact(function, literals, result, parts[1::2])
+        return result
+
+    def _exact(self, function, literals, result, occurrences):
+        # AutoBackend's escalation for a whole line: the decimal result when
+        # the float one differs from it, unless an input is already too long
+        # for floats to hold. `occurrences` lists literals as they appear in
+        # the line, repeats included.
+        backend = self.backend
+        if not math.isfinite(result):
+            return result
+        # Cheap check first. The exact result is a multiple of 10**-scale and
+        # no intermediate value exceeds 10**(digits - scale), where digits is
+        # at most the literals' length plus one each. With 14 digits or fewer
+        # the float error is far below half a step, so rounding to the step
+        # gives the exact result without computing it in decimal.
+        joined = ''.join(occurrences)
+        if len(joined) + len(occurrences) <= 14 and 'e' not in joined and 'E' not in joined:
+            scale = 0
+            if '.' in joined:
+                scale = sum(len(text) - text.index('.') - 1 for text in occurrences if '.' in text)
+            steps = round(result * 10.0 ** scale)
+            if steps / 10 ** scale == result:
+                return result
+            backend.escalations += 1
+            return decimal.Decimal(steps).scaleb(-scale)
+        if any(calc_numeric.significant_digits(text) > backend.max_digits for text in literals):
+            return result
+        with decimal.localcontext(backend.exact.context):
+            value = function(*map(decimal.Decimal, literals))
+        if value == decimal.Decimal(repr(result)):
+            return result
+        backend.escalations += 1
+        return value
+
+    def evaluate_line(self, line):
+        # Returns (result, None) or (None, exception)
+        try:
+            return self.evaluate(line), None
+        except Exception as exc:
+            return None, exc
+
+    def format_line(self, line):
+        if not line.strip():
+            return '\n'
+        try:
+            return f"{format_value(self.evaluate(line))}\n"
+        except Exception as exc:
+            return f"Error: {error_message(exc)}\n"
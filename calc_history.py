@@ -0,0 +1,118 @@
+import mmap
+import os
+import struct
+
+MAGIC = b'CALCHIS2'
+HEADER = struct.Struct('<8sQ')          # magic, record count
+RECORD = struct.Struct('<BBBB84s96s')   # mode, expr len, result len, flags, expression, result
+EXPR_SIZE = 84
+RESULT_SIZE = 96    # a 50-digit decimal result with its exponent fits
+EXPR_OFFSET = 4
+TRUNCATED = 1
+MODES = {'rad': 0, 'deg': 1}
+MODE_NAMES = ('rad', 'deg')
+
+
+class HistoryLog:
+    # Append-only log of fixed-size records, memory-mapped so any entry can be
+    # read by index without loading the rest of the file.
+    def __init__(self, path, grow=4096):
+        self.path = path
+        self.grow = grow
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = os.fdopen(fd, 'r+b')
+        size = os.fstat(fd).st_size
+        if size == 0:
+            size = HEADER.size + grow * RECORD.size
+            self._file.truncate(size)
+            self._mm = mmap.mmap(fd, size)
+            HEADER.pack_into(self._mm, 0, MAGIC, 0)
+        else:
+            self._mm = mmap.mmap(fd, size)
+            magic, _ = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                self.close()
+                raise ValueError(f"{path} is not a calculator history file.")
+        self._count = HEADER.unpack_from(self._mm, 0)[1]
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _capacity(self):
+        return (len(self._mm) - HEADER.size) // RECORD.size
+
+    def _offset(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        return HEADER.size + index * RECORD.size
+
+    def append(self, expression, result, mode='rad'):
+        if self._count == self._capacity():
+            size = len(self._mm) + self.grow * RECORD.size
+            self._mm.close()
+            self._file.truncate(size)
+            self._mm = mmap.mmap(self._file.fileno(), size)
+        expr = expression.encode('utf-8')
+        value = str(result).encode('utf-8')
+        flags = TRUNCATED if len(expr) > EXPR_SIZE or len(value) > RESULT_SIZE else 0
+        expr, value = expr[:EXPR_SIZE], value[:RESULT_SIZE]
+        offset = HEADER.size + self._count * RECORD.size
+        RECORD.pack_into(self._mm, offset, MODES[mode], len(expr), len(value), flags, expr, value)
+        self._count += 1
+        HEADER.pack_into(self._mm, 0, MAGIC, self._count)
+        return self._count - 1
+
+    def __getitem__(self, index):
+        mode, expr_len, value_len, _, expr, value = RECORD.unpack_from(self._mm, self._offset(index))
+        return (expr[:expr_len].decode('utf-8', 'replace'),
+                value[:value_len].decode('utf-8', 'replace'),
+                MODE_NAMES[mode])
+
+    def truncated(self, index):
+        # Whether the entry was cut to fit its record; its result is then
+        # not the value that was computed
+        return bool(RECORD.unpack_from(self._mm, self._offset(index))[3] & TRUNCATED)
+
+    def latest(self, count=10, before=None):
+        # Newest first, starting just before index `before`
+        stop = self._count if before is None else min(before, self._count)
+        for index in range(stop - 1, max(stop - count, 0) - 1, -1):
+            yield index, self[index]
+
+    def search(self, prefix, limit=None):
+        # Newest-first prefix search; mmap.rfind scans the raw bytes so no
+        # records are decoded until one matches.
+        needle = prefix.encode('utf-8')
+        if not needle:
+            yield from self.latest(self._count)
+            return
+        end = HEADER.size + self._count * RECORD.size
+        found = 0
+        while True:
+            pos = self._mm.rfind(needle, HEADER.size, end)
+            if pos < 0:
+                return
+            index, within = divmod(pos - HEADER.size, RECORD.size)
+            if within == EXPR_OFFSET and self._mm[pos - EXPR_OFFSET + 1] >= len(needle):
+                yield index, self[index]
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+                end = pos - EXPR_OFFSET
+            else:
+                end = pos + len(needle) - 1
@@ -0,0 +1,178 @@
+import decimal
+from fractions import Fraction
+
+
+def _check_divisor(op, b):
+    if op == '/' and b == 0:
+        raise ZeroDivisionError
+
+
+def significant_digits(text):
+    mantissa = text.lstrip('+-').split('e')[0].split('E')[0].replace('.', '')
+    return len(mantissa.strip('0')) or 1
+
+
+def _plain(text):
+    # Strip trailing zeros but keep the "x.0" look of float results
+    if 'E' in text or 'e' in text:
+        return text
+    if '.' in text:
+        text = text.rstrip('0')
+        if text.endswith('.'):
+            text += '0'
+    else:
+        text += '.0'
+    return text
+
+
+class FloatBackend:
+    name = 'float'
+
+    def parse(self, text):
+        return float(text)
+
+    def calculate(self, previous, op, current):
+        prev = float(previous)
+        curr = float(current)
+        _check_divisor(op, curr)
+        if op == '+':
+            return prev + curr
+        if op == '-':
+            return prev - curr
+        if op == '*':
+            return prev * curr
+        if op == '/':
+            return prev / curr
+        if op == '**':
+            return prev ** curr
+        raise ValueError(f"Unknown operator {op!r}")
+
+    def format(self, value):
+        return str(value)
+
+
+class DecimalBackend:
+    name = 'decimal'
+
+    def __init__(self, precision=50):
+        self.context = decimal.Context(prec=precision)
+
+    def parse(self, text):
+        return decimal.Decimal(text)
+
+    def calculate(self, previous, op, current):
+        ctx = self.context
+        prev = decimal.Decimal(previous)
+        curr = decimal.Decimal(current)
+        _check_divisor(op, curr)
+        if op == '+':
+            return ctx.add(prev, curr)
+        if op == '-':
+            return ctx.subtract(prev, curr)
+        if op == '*':
+            return ctx.multiply(prev, curr)
+        if op == '/':
+            return ctx.divide(prev, curr)
+        if op == '**':
+            return ctx.power(prev, curr)
+        raise ValueError(f"Unknown operator {op!r}")
+
+    def format(self, value):
+        if not isinstance(value, decimal.Decimal):
+            return str(value)
+        if value == value.to_integral_value() and abs(value.adjusted()) < 28:
+            return f"{value.quantize(decimal.Decimal(1)):f}.0"
+        return _plain(f"{value:f}" if abs(value.adjusted()) < 28 else str(value))
+
+
+class FractionBackend:
+    name = 'fraction'
+
+    def parse(self, text):
+        return Fraction(text)
+
+    def calculate(self, previous, op, current):
+        prev = Fraction(previous)
+        curr = Fraction(current)
+        _check_divisor(op, curr)
+        if op == '+':
+            return prev + curr
+        if op == '-':
+            return prev - curr
+        if op == '*':
+            return prev * curr
+        if op == '/':
+            return prev / curr
+        if op == '**':
+            if curr.denominator == 1:
+                return prev ** curr.numerator
+            return Fraction(float(prev) ** float(curr))
+        raise ValueError(f"Unknown operator {op!r}")
+
+    def format(self, value):
+        if not isinstance(value, Fraction):
+            return str(value)
+        denominator = value.denominator
+        while denominator % 2 == 0:
+            denominator //= 2
+        while denominator % 5 == 0:
+            denominator //= 5
+        if denominator != 1:
+            return f"{value.numerator}/{value.denominator}"
+        # Terminating fraction: print it exactly as a decimal
+        return DecimalBackend(precision=len(str(value.numerator)) + len(str(value.denominator))).format(
+            decimal.Decimal(value.numerator) / decimal.Decimal(value.denominator))
+
+
+class AutoBackend(FloatBackend):
+    # Floats first; only + - * results that show binary rounding artifacts or
+    # lost low-order digits are recomputed exactly.
+    name = 'auto'
+
+    def __init__(self, exact=None, max_digits=15):
+        self.exact = exact or DecimalBackend()
+        self.max_digits = max_digits
+        self.escalations = 0
+
+    def calculate(self, previous, op, current):
+        result = FloatBackend.calculate(self, previous, op, current)
+        if op in ('+', '-', '*') and self.ill_conditioned(previous, op, current, result):
+            self.escalations += 1
+            return self.exact.calculate(previous, op, current)
+        return result
+
+    def ill_conditioned(self, previous, op, current, result):
+        if result != result or result in (float('inf'), float('-inf')):
+            return False
+        limit = self.max_digits
+        if significant_digits(previous) > limit or significant_digits(current) > limit:
+            return False
+        if significant_digits(repr(result)) > limit:
+            return True
+        if op != '*':
+            # TwoSum: a non-zero error term means the float sum was rounded
+            a = float(previous)
+            b = float(current) if op == '+' else -float(current)
+            b_virtual = result - a
+            return (a - (result - b_virtual)) + (b - b_virtual) != 0
+        return False
+
+    def format(self, value):
+        if isinstance(value, float):
+            return str(value)
+        return self.exact.format(value)
+
+
+BACKENDS = {
+    'float': FloatBackend,
+    'decimal': DecimalBackend,
+    'fraction': FractionBackend,
+    'auto': AutoBackend,
+}
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown numeric backend {name!r}") from None
@@ -0,0 +1,169 @@
+import math
+import calc_engine
+
+_ONE = ('num', 1.0)
+_ZERO = ('num', 0.0)
+_TWO = ('num', 2.0)
+
+
+def _fold_binary(op, a, b):
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op == '/':
+        return a / b
+    return math.pow(a, b)
+
+
+def _fold_call(name, value, mode):
+    if mode == 'deg' and name in calc_engine.TRIG_FUNCTIONS:
+        value = math.radians(value)
+    return calc_engine.FUNCTIONS[name](value)
+
+
+def _squared_call(node, name):
+    if node[0] == 'bin' and node[1] == '**' and node[3] == _TWO and node[2][0] == 'call' and node[2][1] == name:
+        return node[2][2]
+    return None
+
+
+def _safe(node):
+    # Evaluating node cannot raise, so an identity may drop it
+    return node[0] == 'var' or (node[0] == 'num' and math.isfinite(node[1]))
+
+
+def simplify(node, mode='rad', trig_identities=False):
+    # Constant folding plus identities that hold for every float argument;
+    # anything that would raise (1/0, log(-1)) or overflow is left for run
+    # time, and identities never drop a sub-tree that could raise.
+    # sin(u)**2 + cos(u)**2 == 1 is opt-in: in floats the sum is often one
+    # ulp off 1, and a variable u may be inf, where sin and cos raise.
+    kind = node[0]
+    if kind in ('num', 'var'):
+        return node
+    if kind == 'neg':
+        operand = simplify(node[1], mode, trig_identities)
+        if operand[0] == 'num':
+            return ('num', -operand[1])
+        if operand[0] == 'neg':
+            return operand[1]
+        return ('neg', operand)
+    if kind == 'call':
+        argument = simplify(node[2], mode, trig_identities)
+        if argument[0] == 'num':
+            try:
+                value = _fold_call(node[1], argument[1], mode)
+            except (ValueError, OverflowError):
+                pass
+            else:
+                if math.isfinite(value):
+                    return ('num', value)
+        return ('call', node[1], argument)
+
+    op = node[1]
+    if op == '+' and trig_identities:
+        # Checked before the squares fold, so constant and variable u agree
+        for a, b in ((node[2], node[3]), (node[3], node[2])):
+            u = _squared_call(a, 'sin')
+            if u is not None and u == _squared_call(b, 'cos') and _safe(simplify(u, mode, trig_identities)):
+                return _ONE
+    left = simplify(node[2], mode, trig_identities)
+    right = simplify(node[3], mode, trig_identities)
+    if left[0] == 'num' and right[0] == 'num':
+        try:
+            value = _fold_binary(op, left[1], right[1])
+        except (ArithmeticError, ValueError):
+            pass
+        else:
+            if math.isfinite(value):
+                return ('num', value)
+    if op == '+':
+        if right == _ZERO:
+            return left
+        if left == _ZERO:
+            return right
+    elif op == '-':
+        if right == _ZERO:
+            return left
+    elif op == '*':
+        if right == _ONE:
+            return left
+        if left == _ONE:
+            return right
+    elif op == '/':
+        if right == _ONE:
+            return left
+    elif op == '**':
+        if right == _ONE:
+            return left
+        if right == _ZERO and _safe(left):
+            return _ONE
+    return ('bin', op, left, right)
+
+
+def _count_subtrees(tree):
+    counts = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node[0] in ('num', 'var'):
+            continue
+        seen = counts.get(node, 0)
+        counts[node] = seen + 1
+        if seen:
+            continue
+        if node[0] == 'neg':
+            stack.append(node[1])
+        else:
+            stack.extend(node[2:])
+    return counts
+
+
+def cse_source(tree, mode='rad'):
+    # Repeated sub-trees are computed once into a local (assignment
+    # expression) at their first, left-most use and reused afterwards.
+    temps = {}
+    for node, count in _count_subtrees(tree).items():
+        if count > 1:
+            temps[node] = f"_t{len(temps)}"
+    emitted = set()
+
+    def child(node):
+        name = temps.get(node)
+        if name is None:
+            return calc_engine._source(node, mode, child)
+        if node in emitted:
+            return name
+        emitted.add(node)
+        return f"({name} := {calc_engine._source(node, mode, child)})"
+    return child(tree)
+
+
+def optimize(tree, mode='rad', trig_identities=False):
+    return simplify(tree, mode, trig_identities)
+
+
+def compile_optimized(text, mode='rad', trig_identities=False):
+    tree = optimize(calc_engine.parse(text), mode, trig_identities)
+    return calc_engine.CompiledExpression(text, tree, mode, source=cse_source(tree, mode))
+
+
+def evaluate_many(expression, rows, mode='rad', trig_identities=False):
+    # rows: mappings of variable name to value, or sequences ordered like
+    # compiled.variables (alphabetical)
+    compiled = expression
+    if not isinstance(compiled, calc_engine.CompiledExpression):
+        compiled = compile_optimized(expression, mode, trig_identities)
+    function = compiled.function
+    names = compiled.variables
+    results = []
+    append = results.append
+    for row in rows:
+        if isinstance(row, dict):
+            append(function(*[row[name] for name in names]))
+        else:
+            append(function(*row))
+    return results
@@ -0,0 +1,83 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import calc_engine
+
+_evaluator = None
+
+
+def _init_worker(mode):
+    global _evaluator
+    _evaluator = calc_engine.BatchEvaluator(mode)
+
+
+def _evaluate_chunk(first_line, lines):
+    # Each item is a float, None for a blank line, or an error record
+    start = time.perf_counter()
+    evaluate = _evaluator.evaluate
+    results = []
+    for number, line in enumerate(lines, first_line):
+        if not line.strip():
+            results.append(None)
+            continue
+        try:
+            results.append(evaluate(line))
+        except Exception as exc:
+            results.append({
+                'line': number,
+                'text': line.rstrip('\n'),
+                'error': type(exc).__name__,
+                'message': calc_engine.error_message(exc),
+            })
+    return results, time.perf_counter() - start
+
+
+class ChunkSizer:
+    # Steers the chunk size towards a target wall time per chunk
+    def __init__(self, initial=1024, target_latency=0.05, minimum=64, maximum=262144):
+        self.size = initial
+        self.target_latency = target_latency
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def record(self, lines, elapsed):
+        if not lines or elapsed <= 0:
+            return
+        ideal = self.target_latency * lines / elapsed
+        # Move halfway so one slow chunk cannot swing the size too far
+        self.size = int(min(self.maximum, max(self.minimum, (self.size + ideal) / 2)))
+
+
+def evaluate_parallel(lines, mode='rad', workers=None, chunk_size=None, target_latency=0.05):
+    # Yields one item per input line, in input order
+    workers = workers or os.cpu_count() or 1
+    sizer = ChunkSizer(chunk_size or 1024, target_latency)
+    adaptive = chunk_size is None
+    lines = iter(lines)
+    next_line = 1
+    pending = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(mode,)) as pool:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(lines, sizer.size))
+                if not chunk:
+                    break
+                pending.append((len(chunk), pool.submit(_evaluate_chunk, next_line, chunk)))
+                next_line += len(chunk)
+            if not pending:
+                break
+            count, future = pending.popleft()
+            results, elapsed = future.result()
+            if adaptive:
+                sizer.record(count, elapsed)
+            yield from results
+
+
+def format_result(item):
+    if item is None:
+        return '\n'
+    if isinstance(item, dict):
+        return f"Error: {item['message']}\n"
+    return f"{calc_engine.format_value(item)}\n"
@@ -0,0 +1,114 @@
+import argparse
+import sys
+import numpy as np
+import calc_engine
+
+SCIENTIFIC_EXPRESSIONS = {
+    'sin': 'sin(x)',
+    'cos': 'cos(x)',
+    'tan': 'tan(x)',
+    'log': 'log(x)',
+    'ln': 'ln(x)',
+    'exp': 'exp(x)',
+    'sqrt': 'sqrt(x)',
+    'one_over': '1/x',
+}
+
+_UFUNCS = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'log': np.log10,
+    'ln': np.log,
+    'exp': np.exp,
+    'sqrt': np.sqrt,
+}
+
+
+def _evaluate(node, arrays, mode, invalid):
+    kind = node[0]
+    if kind == 'num':
+        return node[1]
+    if kind == 'var':
+        try:
+            return arrays[node[1]]
+        except KeyError:
+            raise calc_engine.ExpressionError(f"Unknown name {node[1]!r}") from None
+    if kind == 'neg':
+        return -_evaluate(node[1], arrays, mode, invalid)
+    if kind == 'bin':
+        op = node[1]
+        left = _evaluate(node[2], arrays, mode, invalid)
+        right = _evaluate(node[3], arrays, mode, invalid)
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        if op == '/':
+            invalid |= np.asarray(right) == 0
+            # Through numpy even for two scalars, which would raise on 0
+            return np.divide(np.asarray(left, dtype=float), right)
+        # Negative bases with fractional exponents have no real result
+        invalid |= (np.asarray(left) < 0) & (np.asarray(right) != np.floor(right))
+        return np.power(np.asarray(left, dtype=float), right)
+    name = node[1]
+    argument = _evaluate(node[2], arrays, mode, invalid)
+    if name in ('log', 'ln'):
+        invalid |= np.asarray(argument) <= 0
+    elif name == 'sqrt':
+        invalid |= np.asarray(argument) < 0
+    elif mode == 'deg' and name in calc_engine.TRIG_FUNCTIONS:
+        argument = np.radians(argument)
+    return _UFUNCS[name](argument)
+
+
+def evaluate_array(expression, values, mode='rad', name='x'):
+    # Returns (results, invalid) where invalid is a boolean mask; results hold
+    # NaN wherever the scalar Calculator would have shown an error.
+    tree = expression.tree if isinstance(expression, calc_engine.CompiledExpression) else calc_engine.parse(expression)
+    arrays = values if isinstance(values, dict) else {name: values}
+    arrays = {key: np.asarray(array, dtype=float) for key, array in arrays.items()}
+    shape = np.broadcast_shapes(*(array.shape for array in arrays.values())) if arrays else ()
+    invalid = np.zeros(shape, dtype=bool)
+    with np.errstate(all='ignore'):
+        result = _evaluate(tree, arrays, mode, invalid)
+        result = np.broadcast_to(np.asarray(result, dtype=float), shape).copy()
+    invalid |= ~np.isfinite(result)
+    result[invalid] = np.nan
+    return result, invalid
+
+
+def apply(func_name, values, mode='rad'):
+    return evaluate_array(SCIENTIFIC_EXPRESSIONS[func_name], values, mode)
+
+
+def load_values(path, column=0, delimiter=',', skip_header=0):
+    if str(path).endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return np.loadtxt(path, delimiter=delimiter, usecols=column, skiprows=skip_header, ndmin=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate one expression over a column of values.")
+    parser.add_argument('expression', help="expression in x, e.g. 'sin(x)**2'")
+    parser.add_argument('input', help=".npy file or delimited text file")
+    parser.add_argument('-c', '--column', type=int, default=0)
+    parser.add_argument('-d', '--delimiter', default=',')
+    parser.add_argument('--skip-header', type=int, default=0)
+    parser.add_argument('-m', '--mode', choices=('rad', 'deg'), default='rad')
+    parser.add_argument('-o', '--output', help="write results to this .npy file instead of stdout")
+    args = parser.parse_args(argv)
+
+    values = load_values(args.input, args.column, args.delimiter, args.skip_header)
+    result, invalid = evaluate_array(args.expression, values, args.mode)
+    if args.output:
+        np.save(args.output, result)
+    else:
+        np.savetxt(sys.stdout, result)
+    print(f"{int(invalid.sum())} of {invalid.size} values invalid", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,45 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
-import string
-import math
 import pyperclip
-
-def calculate_entropy(pwd):
-    char_set_size = 0
-    if any(c.isupper() for c in pwd): char_set_size += 26
-    if any(c.islower() for c in pwd): char_set_size += 26
-    if any(c.isdigit() for c in pwd): char_set_size += 10
-    if any(c in string.punctuation for c in pwd): char_set_size += len(string.punctuation)
-    if char_set_size == 0: return 0
-    return len(pwd) * math.log2(char_set_size)
-
-def check_strength(pwd):
-    length = len(pwd)
-    has_upper = any(c.isupper() for c in pwd)
-    has_lower = any(c.islower() for c in pwd)
-    has_digit = any(c.isdigit() for c in pwd)
-    has_symbol = any(c in string.punctuation for c in pwd)
-    score = sum([has_upper, has_lower, has_digit, has_symbol])
-    entropy = calculate_entropy(pwd)
-    
-    if length >= 16 and score == 4 and entropy >= 80:
-        return "Very Strong", "darkgreen", 100
-    elif length >= 12 and score == 4 and entropy >= 60:
-        return "Strong", "green", 80
-    elif length >= 8 and score >= 3 and entropy >= 40:
-        return "Moderate", "orange", 60
-    elif length >= 6 and score >= 2:
-        return "Weak", "red", 40
-    else:
-        return "Very Weak", "darkred", 20
+import password_blocklist
+import password_history
+import password_policy
+import password_wordlist
+import password_strength
+
+LIVE_DELAY_MS = 150     # wait for a pause in typing before rating
+LIVE_POLL_MS = 16       # check for a finished rating about once a frame
+
+def known_entropy(pwd):
+    # A generated passphrase is rated by its random choices, not its letters
+    return last_passphrase[1] if pwd == last_passphrase[0] else None
+
+def generate_passphrase():
+    global last_passphrase
+    wordlist = password_wordlist.default()
+    if wordlist is None:
+        messagebox.showerror("No Wordlist", "No wordlist found. Build one with: python -m password_wordlist build")
+        return None
+    try:
+        words = word_count.get()
+        if words < 1:
+            raise ValueError("A passphrase needs at least one word.")
+    except (ValueError, tk.TclError):
+        messagebox.showerror("Invalid Input", "A passphrase needs at least one word.")
+        return None
+    phrase = password_wordlist.generate_passphrase(wordlist, words, separator.get(), capitalize_words.get(),
+                                                   inject_digit.get())
+    last_passphrase = (phrase, password_wordlist.passphrase_entropy(len(wordlist), words, inject_digit.get()))
+    return phrase
 
 def generate_password():
+    if passphrase_mode.get():
+        password = generate_passphrase()
+        if password is not None:
+            show_generated_password(password)
+        return
     try:
         length = length_var.get()
         if length < 4:
@@ -42,28 +47,30 @@ def generate_password():
     except ValueError:
         messagebox.showerror("Invalid Input", "Password length must be at least 4.")
         return
-    chars = ''
-    if use_upper.get(): chars += string.ascii_uppercase
-    if use_lower.get(): chars += string.ascii_lowercase
-    if use_digits.get(): chars += string.digits
-    if use_symbols.get(): chars += string.punctuation
-    if exclude_ambiguous.get():
-        ambiguous = 'l1I0O'
-        chars = ''.join(c for c in chars if c not in ambiguous)
-    if not chars:
+    if not (use_upper.get() or use_lower.get() or use_digits.get() or use_symbols.get()):
         messagebox.showerror("Invalid Selection", "Please select at least one character set.")
         return
-    password = ''.join(random.choice(chars) for _ in range(length))
+    # Every selected character set appears at least once
+    policy = password_policy.from_options(length, use_upper.get(), use_lower.get(), use_digits.get(),
+                                          use_symbols.get(), exclude_ambiguous.get())
+    show_generated_password(policy.generate()[0])
+
+def show_generated_password(password):
     generated_password.set(password)
-    password_history.append(password)
-    update_history_listbox()
+    add_to_history(password)
     show_strength(password, strength_label, strength_progress)
     if auto_copy.get():
         copy_to_clipboard()
 
 def show_strength(pwd, label, progress):
-    strength, color, progress_value = check_strength(pwd)
-    label.config(text=f"Strength: {strength} (Entropy: {calculate_entropy(pwd):.2f} bits)", foreground=color)
+    analysis = password_strength.analyze(pwd, password_blocklist.default(), patterns=True, entropy=known_entropy(pwd))
+    render_strength(analysis, label, progress)
+
+def render_strength(analysis, label, progress):
+    strength, color, progress_value = analysis.rating
+    if analysis.breached:
+        strength += ", found in breach list"
+    label.config(text=f"Strength: {strength} (Entropy: {analysis.entropy:.2f} bits)", foreground=color)
     progress['value'] = progress_value
 
 def copy_to_clipboard():
@@ -79,7 +86,71 @@ def check_custom():
     if not pwd:
         messagebox.showwarning("Input Required", "Please enter a password.")
         return
-    show_strength(pwd, custom_strength_label, custom_strength_progress)
+    if live_after_id is not None:
+        root.after_cancel(live_after_id)
+    submit_live(live_generation)
+
+def live_worker():
+    # Rates passwords off the Tk thread. Requests superseded by newer typing
+    # are dropped before any work is done on them.
+    while True:
+        generation, pwd = live_requests.get()
+        try:
+            while True:
+                generation, pwd = live_requests.get_nowait()
+        except queue.Empty:
+            pass
+        if generation != live_generation:
+            continue
+        # Any failure is posted as the result; an exception escaping here
+        # would end the thread and silently stop the live meter
+        try:
+            analysis = password_strength.analyze(pwd, password_blocklist.default(), patterns=True)
+            analysis.rating_index   # compute entropy here, not when rendering
+        except Exception as exc:
+            analysis = exc
+        live_results.put((generation, analysis))
+
+def on_custom_change(*args):
+    global live_generation, live_after_id
+    live_generation += 1
+    if live_after_id is not None:
+        root.after_cancel(live_after_id)
+        live_after_id = None
+    if not custom_input.get():
+        custom_strength_label.config(text="Strength: ", foreground='')
+        custom_strength_progress['value'] = 0
+        return
+    live_after_id = root.after(LIVE_DELAY_MS, submit_live, live_generation)
+
+def submit_live(generation):
+    global live_after_id, live_submitted, live_polling
+    live_after_id = None
+    live_submitted = generation
+    live_requests.put((generation, custom_input.get()))
+    if not live_polling:
+        live_polling = True
+        root.after(LIVE_POLL_MS, poll_live_results)
+
+def poll_live_results():
+    global live_polling, live_rendered
+    try:
+        while True:
+            generation, analysis = live_results.get_nowait()
+            # Results for text that has since changed are stale
+            if generation == live_generation:
+                if isinstance(analysis, Exception):
+                    custom_strength_label.config(text=f"Strength: unavailable ({analysis})", foreground='red')
+                    custom_strength_progress['value'] = 0
+                else:
+                    render_strength(analysis, custom_strength_label, custom_strength_progress)
+                live_rendered = generation
+    except queue.Empty:
+        pass
+    if live_rendered < live_submitted == live_generation:
+        root.after(LIVE_POLL_MS, poll_live_results)
+    else:
+        live_polling = False
 
 def toggle_show_generated():
     generated_entry.config(show='' if show_generated.get() else '*')
@@ -90,10 +161,33 @@ def toggle_show_custom():
 def update_length_label(value):
     length_label.config(text=f"Password Length: {int(float(value))}")
 
-def update_history_listbox():
+def add_to_history(pwd):
+    global history_page
+    evicted = history.append(pwd)
+    if history_page != 0:
+        history_page = 0
+        show_history_page()
+        return
+    # Only the changed rows are touched: one insert, at most one delete
+    history_listbox.insert(tk.END, pwd)
+    if evicted is not None:
+        history_listbox.delete(0)
+    update_history_buttons()
+
+def show_history_page():
     history_listbox.delete(0, tk.END)
-    for pwd in password_history[-5:]:
+    for pwd in history.page(history_page):
         history_listbox.insert(tk.END, pwd)
+    update_history_buttons()
+
+def update_history_buttons():
+    older_button.config(state='normal' if history_page + 1 < history.page_count() else 'disabled')
+    newer_button.config(state='normal' if history_page > 0 else 'disabled')
+
+def move_history_page(step):
+    global history_page
+    history_page = max(0, min(history_page + step, history.page_count() - 1))
+    show_history_page()
 
 def copy_selected_history():
     selection = history_listbox.curselection()
@@ -133,19 +227,42 @@ length_label.grid(row=1, column=0, sticky='w', pady=5)
 ttk.Scale(generator_frame, from_=4, to=32, orient='horizontal', variable=length_var, command=update_length_label).grid(row=1, column=1, sticky='ew', pady=5)
 
 use_upper = tk.BooleanVar(value=True)
-ttk.Checkbutton(generator_frame, text="Include Uppercase (A-Z)", variable=use_upper).grid(row=2, column=0, columnspan=2, sticky='w', pady=2)
+ttk.Checkbutton(generator_frame, text="Include Uppercase (A-Z)", variable=use_upper).grid(row=2, column=0, sticky='w', pady=2)
 
 use_lower = tk.BooleanVar(value=True)
-ttk.Checkbutton(generator_frame, text="Include Lowercase (a-z)", variable=use_lower).grid(row=3, column=0, columnspan=2, sticky='w', pady=2)
+ttk.Checkbutton(generator_frame, text="Include Lowercase (a-z)", variable=use_lower).grid(row=3, column=0, sticky='w', pady=2)
 
 use_digits = tk.BooleanVar(value=True)
-ttk.Checkbutton(generator_frame, text="Include Digits (0-9)", variable=use_digits).grid(row=4, column=0, columnspan=2, sticky='w', pady=2)
+ttk.Checkbutton(generator_frame, text="Include Digits (0-9)", variable=use_digits).grid(row=4, column=0, sticky='w', pady=2)
 
 use_symbols = tk.BooleanVar(value=True)
-ttk.Checkbutton(generator_frame, text="Include Symbols (!@# etc.)", variable=use_symbols).grid(row=5, column=0, columnspan=2, sticky='w', pady=2)
+ttk.Checkbutton(generator_frame, text="Include Symbols (!@# etc.)", variable=use_symbols).grid(row=5, column=0, sticky='w', pady=2)
 
 exclude_ambiguous = tk.BooleanVar(value=False)
-ttk.Checkbutton(generator_frame, text="Exclude Ambiguous Chars (l1I0O)", variable=exclude_ambiguous).grid(row=6, column=0, columnspan=2, sticky='w', pady=2)
+ttk.Checkbutton(generator_frame, text="Exclude Ambiguous Chars (l1I0O)", variable=exclude_ambiguous).grid(row=6, column=0, sticky='w', pady=2)
+
+# Passphrase options, beside the character sets they replace
+passphrase_mode = tk.BooleanVar(value=False)
+ttk.Checkbutton(generator_frame, text="Passphrase Mode (words)", variable=passphrase_mode).grid(row=2, column=1, sticky='w', pady=2)
+
+word_count_frame = ttk.Frame(generator_frame)
+word_count_frame.grid(row=3, column=1, sticky='w', pady=2)
+ttk.Label(word_count_frame, text="Words:").pack(side='left')
+word_count = tk.IntVar(value=6)
+ttk.Spinbox(word_count_frame, from_=3, to=10, textvariable=word_count, width=4).pack(side='left', padx=5)
+
+separator_frame = ttk.Frame(generator_frame)
+separator_frame.grid(row=4, column=1, sticky='w', pady=2)
+ttk.Label(separator_frame, text="Separator:").pack(side='left')
+separator = tk.StringVar(value='-')
+ttk.Entry(separator_frame, textvariable=separator, width=4).pack(side='left', padx=5)
+
+capitalize_words = tk.BooleanVar(value=False)
+ttk.Checkbutton(generator_frame, text="Capitalize Words", variable=capitalize_words).grid(row=5, column=1, sticky='w', pady=2)
+
+inject_digit = tk.BooleanVar(value=False)
+ttk.Checkbutton(generator_frame, text="Add a Digit", variable=inject_digit).grid(row=6, column=1, sticky='w', pady=2)
+last_passphrase = (None, None)
 
 auto_copy = tk.BooleanVar(value=False)
 ttk.Checkbutton(generator_frame, text="Auto Copy to Clipboard", variable=auto_copy).grid(row=7, column=0, columnspan=2, sticky='w', pady=2)
@@ -171,8 +288,20 @@ strength_progress.grid(row=12, column=0, columnspan=2, pady=5)
 ttk.Label(generator_frame, text="Password History (Last 5)", font=("Helvetica", 12, "bold")).grid(row=13, column=0, columnspan=2, pady=5)
 history_listbox = tk.Listbox(generator_frame, height=5, width=40, font=("Consolas", 10))
 history_listbox.grid(row=14, column=0, columnspan=2, pady=5)
+older_button = ttk.Button(generator_frame, text="◀ Older", command=lambda: move_history_page(1))
+older_button.grid(row=15, column=0, sticky='w', pady=5)
 ttk.Button(generator_frame, text="Copy Selected", command=copy_selected_history).grid(row=15, column=0, columnspan=2, pady=5)
-password_history = []
+newer_button = ttk.Button(generator_frame, text="Newer ▶", command=lambda: move_history_page(-1))
+newer_button.grid(row=15, column=1, sticky='e', pady=5)
+# Older entries go to an encrypted file when $PASSWORD_HISTORY_KEY is set
+try:
+    history_spill = password_history.open_spill()
+except ValueError as exc:
+    messagebox.showwarning("History Not Saved", f"{exc} Older passwords will not be kept.")
+    history_spill = None
+history = password_history.PasswordHistory(5, history_spill)
+history_page = 0
+update_history_buttons()
 
 # Separator
 ttk.Separator(root, orient='horizontal').pack(fill='x', pady=10)
@@ -198,8 +327,20 @@ custom_strength_label.grid(row=3, column=0, columnspan=2, pady=5)
 custom_strength_progress = ttk.Progressbar(checker_frame, orient='horizontal', length=200, mode='determinate')
 custom_strength_progress.grid(row=4, column=0, columnspan=2, pady=5)
 
+# Live rating as you type
+live_requests = queue.Queue()
+live_results = queue.Queue()
+live_generation = 0     # bumped on every edit of custom_input
+live_submitted = 0
+live_rendered = 0
+live_after_id = None
+live_polling = False
+threading.Thread(target=live_worker, daemon=True).start()
+custom_input.trace_add('write', on_custom_change)
+
 # Column configure for responsiveness
 generator_frame.columnconfigure(1, weight=1)
 checker_frame.columnconfigure(1, weight=1)
 
 root.mainloop()
+history.close()
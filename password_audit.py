@@ -0,0 +1,129 @@
+import argparse
+import json
+import mmap
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import password_blocklist
+import password_strength
+
+BLOCK_SIZE = 8 << 20
+HISTOGRAM_BIN = 10      # bits of entropy per histogram bucket
+HISTOGRAM_BINS = 21     # the last bucket collects everything >= 200 bits
+
+
+def split_ranges(path, parts):
+    # Byte ranges of roughly equal size that start and end on line boundaries
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [0]
+        for i in range(1, parts):
+            cut = mm.find(b'\n', max(size * i // parts, bounds[-1]))
+            if cut < 0:
+                break
+            if cut + 1 > bounds[-1] and cut + 1 < size:
+                bounds.append(cut + 1)
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _blocks(mm, start, end):
+    # Yields lists of lines from mm[start:end], BLOCK_SIZE bytes at a time
+    while start < end:
+        stop = min(start + BLOCK_SIZE, end)
+        if stop < end:
+            cut = mm.rfind(b'\n', start, stop)
+            stop = cut + 1 if cut >= start else mm.find(b'\n', stop, end) + 1 or end
+        lines = mm[start:stop].split(b'\n')
+        if lines and lines[-1] == b'':
+            lines.pop()
+        yield lines
+        start = stop
+
+
+def audit_range(path, start, end, part_path=None, blocklist_path=None, patterns=False):
+    counts = [0] * len(password_strength.RATINGS)
+    histogram = [0] * HISTOGRAM_BINS
+    analyze = password_strength.analyze
+    last_bin = HISTOGRAM_BINS - 1
+    blocklist = password_blocklist.Blocklist(blocklist_path) if blocklist_path else None
+    out = open(part_path, 'wb') if part_path else None
+    lines = 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for block in _blocks(mm, start, end):
+            codes = bytearray(len(block))
+            for i, raw in enumerate(block):
+                if raw.endswith(b'\r'):
+                    raw = raw[:-1]
+                analysis = analyze(raw.decode('utf-8', 'surrogateescape'), blocklist, patterns)
+                rating = analysis.rating_index
+                counts[rating] += 1
+                bucket = int(analysis.entropy // HISTOGRAM_BIN)
+                histogram[bucket if bucket < last_bin else last_bin] += 1
+                codes[i] = 48 + rating
+            lines += len(block)
+            if out is not None:
+                out.write(codes)
+    if out is not None:
+        out.close()
+    if blocklist is not None:
+        blocklist.close()
+    return lines, counts, histogram
+
+
+def audit(path, workers=None, output=None, parts_per_worker=4, blocklist_path=None, patterns=False):
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(path, workers * parts_per_worker)
+    part_paths = [f"{output}.part{i}" if output else None for i in range(len(ranges))]
+    lines = 0
+    counts = [0] * len(password_strength.RATINGS)
+    histogram = [0] * HISTOGRAM_BINS
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(audit_range, path, start, end, part, blocklist_path, patterns)
+                   for (start, end), part in zip(ranges, part_paths)]
+        for future in futures:
+            part_lines, part_counts, part_histogram = future.result()
+            lines += part_lines
+            counts = [a + b for a, b in zip(counts, part_counts)]
+            histogram = [a + b for a, b in zip(histogram, part_histogram)]
+    if output:
+        # One ASCII digit per input line: 0 = Very Weak ... 4 = Very Strong
+        with open(output, 'wb') as out:
+            for part in part_paths:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                os.remove(part)
+    return {
+        'lines': lines,
+        'ratings': {name: count for (name, _, _), count in zip(password_strength.RATINGS, counts)},
+        'entropy_histogram': {
+            (f"{i * HISTOGRAM_BIN}-{(i + 1) * HISTOGRAM_BIN}" if i < HISTOGRAM_BINS - 1
+             else f"{i * HISTOGRAM_BIN}+"): count
+            for i, count in enumerate(histogram)
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate every password in a file, one per line.")
+    parser.add_argument('input', help="text file with one password per line")
+    parser.add_argument('-j', '--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('-o', '--output', help="write one rating digit (0-4) per line to this file")
+    parser.add_argument('-b', '--blocklist', help="index built by password_blocklist; listed passwords rate Very Weak")
+    parser.add_argument('-p', '--patterns', action='store_true',
+                        help="discount dictionary words, keyboard walks, dates and repeats from entropy")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = audit(args.input, args.workers, args.output, blocklist_path=args.blocklist, patterns=args.patterns)
+    elapsed = time.perf_counter() - start
+    report['seconds'] = round(elapsed, 3)
+    report['lines_per_second'] = round(report['lines'] / elapsed) if elapsed else 0
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import random
+import time
+import password_engine
+import password_patterns
+import password_policy
+import password_strength
+
+
+def corpus(count, seed=0):
+    # Half uniformly random passwords, half built from the usual human patterns
+    rng = random.Random(seed)
+    words = list(password_patterns.tables().ranks)
+    randoms = password_engine.generate_passwords(count // 2, 12, password_engine.build_alphabet())
+    human = []
+    for _ in range(count - len(randoms)):
+        word = rng.choice(words)
+        shape = rng.randrange(4)
+        if shape == 0:
+            human.append(word.capitalize() + str(rng.randint(0, 9999)) + rng.choice('!@#$'))
+        elif shape == 1:
+            human.append(word + str(rng.randint(1950, 2025)))
+        elif shape == 2:
+            human.append(rng.choice(words) + rng.choice(words) + rng.choice(words))
+        else:
+            human.append(rng.choice(['qwerty', 'asdfgh', 'zxcvbn', '123456', 'abcdef']) + word)
+    return randoms + human
+
+
+def time_estimator(name, estimator, passwords):
+    start = time.perf_counter()
+    bits = [estimator(pwd) for pwd in passwords]
+    elapsed = time.perf_counter() - start
+    return {
+        'name': name,
+        'us_per_password': elapsed / len(passwords) * 1e6,
+        'passwords_per_sec': len(passwords) / elapsed,
+        'mean_bits': sum(bits) / len(bits),
+    }, bits
+
+
+def time_policy(name, policy, size):
+    # Constructive generation against sampling from the whole alphabet and
+    # retrying until the policy passes
+    start = time.perf_counter()
+    policy.generate(size)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    _, retries = password_policy.generate_and_test(policy, size)
+    tested = time.perf_counter() - start
+    return [
+        {'name': f'{name}_constructive', 'us_per_password': built / size * 1e6,
+         'passwords_per_sec': size / built},
+        {'name': f'{name}_generate_and_test', 'us_per_password': tested / size * 1e6,
+         'passwords_per_sec': size / tested, 'retries_per_password': retries / size,
+         'saved_fraction': 1 - built / tested},
+    ]
+
+
+POLICIES = {
+    'policy_4_classes': password_policy.Policy(12),
+    'policy_no_runs': password_policy.Policy(12, max_repeat=1, max_run=2),
+    'policy_2_each': password_policy.Policy(16, {name: 2 for name in password_policy.CLASSES},
+                                            max_repeat=1, max_run=2),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the password tools.")
+    parser.add_argument('-n', '--size', type=int, default=20000, help="passwords per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    passwords = corpus(args.size, args.seed)
+    password_patterns.tables()
+    results = []
+    naive, naive_bits = time_estimator('naive_entropy', lambda pwd: password_strength.analyze(pwd).entropy,
+                                       passwords)
+    pattern, pattern_bits = time_estimator('pattern_entropy', password_patterns.pattern_entropy, passwords)
+    lowered = sum(p < n - 1e-9 for p, n in zip(pattern_bits, naive_bits))
+    pattern['lowered_fraction'] = lowered / len(passwords)
+    results += [naive, pattern]
+    for name, policy in POLICIES.items():
+        results += time_policy(name, policy, args.size)
+
+    for row in results:
+        extra = ''
+        if 'mean_bits' in row:
+            extra += f"  mean {row['mean_bits']:6.1f} bits"
+        if 'lowered_fraction' in row:
+            extra += f"  lowered {row['lowered_fraction']:.1%}"
+        if 'retries_per_password' in row:
+            extra += f"  {row['retries_per_password']:.2f} retries each, constructive saves {row['saved_fraction']:.0%}"
+        print(f"{row['name']:34} {row['us_per_password']:9.2f} us  {row['passwords_per_sec']:12,.0f}/s{extra}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'size': args.size, 'seed': args.seed, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
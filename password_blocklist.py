@@ -0,0 +1,183 @@
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import warnings
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+
+MAGIC = b'PWBLOCK2'
+HEADER = struct.Struct('<8sQ')      # magic, number of hashes
+BUCKET_BITS = 16                    # hashes are followed by a table of bucket starts
+RUN_SIZE = 4_000_000                # hashes sorted in memory per run while building
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blocklist.idx')
+
+
+def password_hash(pwd):
+    # 64-bit BLAKE2b digest; collisions are negligible at 10^8 entries
+    if isinstance(pwd, str):
+        pwd = pwd.encode('utf-8', 'surrogateescape')
+    return int.from_bytes(blake2b(pwd, digest_size=8).digest(), 'little')
+
+
+class Blocklist:
+    # Sorted array of 64-bit password hashes, memory-mapped and searched with
+    # bisect directly on the mapping, so opening it reads nothing but the header.
+    # A table of where each top-16-bit bucket starts narrows every search to a
+    # few hundred entries.
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = HEADER.unpack_from(self._mm, 0)
+        except (ValueError, struct.error):
+            magic = count = None
+        end = HEADER.size + (count or 0) * 8
+        if magic != MAGIC or len(self._mm) < end + ((1 << BUCKET_BITS) + 1) * 8:
+            self.close()
+            raise ValueError(f"{path} is not a password blocklist index.")
+        self._hashes = memoryview(self._mm)[HEADER.size:end].cast('Q')
+        self._buckets = memoryview(self._mm)[end:end + ((1 << BUCKET_BITS) + 1) * 8].cast('Q')
+        self._shift = 64 - BUCKET_BITS
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, pwd):
+        key = password_hash(pwd)
+        hashes = self._hashes
+        bucket = key >> self._shift
+        hi = self._buckets[bucket + 1]
+        i = bisect_left(hashes, key, self._buckets[bucket], hi)
+        return i < hi and hashes[i] == key
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_hashes', None) is not None:
+            self._hashes.release()
+            self._buckets.release()
+            self._hashes = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+_default = None
+
+
+def default():
+    # Shared blocklist from $PASSWORD_BLOCKLIST or blocklist.idx next to this
+    # file; None when neither exists. An unreadable index is reported once and
+    # then treated as missing.
+    global _default
+    if _default is None:
+        path = os.environ.get('PASSWORD_BLOCKLIST', DEFAULT_PATH)
+        _default = False
+        if os.path.exists(path):
+            try:
+                _default = Blocklist(path)
+            except (OSError, ValueError) as exc:
+                warnings.warn(f"Breach check disabled: {exc}", RuntimeWarning, stacklevel=2)
+    return _default or None
+
+
+def _write_run(hashes, directory):
+    hashes = array('Q', sorted(hashes))
+    f = tempfile.TemporaryFile(dir=directory)
+    hashes.tofile(f)
+    f.seek(0)
+    return f
+
+
+def _read_run(f, block=65536):
+    while True:
+        chunk = array('Q')
+        try:
+            chunk.fromfile(f, block)
+        except EOFError:
+            pass
+        if not chunk:
+            return
+        yield from chunk
+
+
+def build(source, output, run_size=RUN_SIZE):
+    # Hashes every line of `source`, sorts in bounded runs and merges them
+    directory = os.path.dirname(os.path.abspath(output))
+    runs = []
+    current = array('Q')
+    with open(source, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            if line:
+                current.append(password_hash(line))
+                if len(current) >= run_size:
+                    runs.append(_write_run(current, directory))
+                    current = array('Q')
+    if current:
+        runs.append(_write_run(current, directory))
+
+    count = 0
+    previous = None
+    buffer = array('Q')
+    shift = 64 - BUCKET_BITS
+    bucket_sizes = array('Q', bytes(8 << BUCKET_BITS))
+    with open(output + '.tmp', 'wb') as out:
+        out.write(HEADER.pack(MAGIC, 0))
+        for value in heapq.merge(*(_read_run(run) for run in runs)):
+            if value != previous:
+                buffer.append(value)
+                bucket_sizes[value >> shift] += 1
+                previous = value
+                if len(buffer) >= 65536:
+                    buffer.tofile(out)
+                    count += len(buffer)
+                    buffer = array('Q')
+        buffer.tofile(out)
+        count += len(buffer)
+        starts = array('Q', [0])
+        for size in bucket_sizes:
+            starts.append(starts[-1] + size)
+        starts.tofile(out)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, count))
+    for run in runs:
+        run.close()
+    os.replace(output + '.tmp', output)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a breached-password blocklist index.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_cmd = commands.add_parser('build', help="build an index from a text file, one password per line")
+    build_cmd.add_argument('source')
+    build_cmd.add_argument('output', nargs='?', default=DEFAULT_PATH)
+    check_cmd = commands.add_parser('check', help="report whether passwords read from stdin are listed")
+    check_cmd.add_argument('index', nargs='?', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build(args.source, args.output)
+        print(f"{count} unique passwords indexed in {args.output}")
+    else:
+        with Blocklist(args.index) as blocklist:
+            for line in sys.stdin:
+                pwd = line.rstrip('\r\n')
+                print(f"{'listed' if pwd in blocklist else 'ok'}\t{pwd}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+import password_engine
+
+
+def stream_passwords(outfile, count, length, alphabet, chunk_size=65536):
+    sampler = password_engine.Sampler(alphabet)
+    remaining = count
+    while remaining > 0:
+        batch = min(chunk_size, remaining)
+        outfile.write(sampler.block(batch, length))
+        remaining -= batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write generated passwords, one per line.")
+    parser.add_argument('-n', '--count', type=int, default=1, help="number of passwords")
+    parser.add_argument('-l', '--length', type=int, default=12, help="password length (at least 4)")
+    parser.add_argument('--no-upper', action='store_true', help="leave out uppercase letters")
+    parser.add_argument('--no-lower', action='store_true', help="leave out lowercase letters")
+    parser.add_argument('--no-digits', action='store_true', help="leave out digits")
+    parser.add_argument('--no-symbols', action='store_true', help="leave out punctuation")
+    parser.add_argument('--exclude-ambiguous', action='store_true', help="leave out l1I0O")
+    parser.add_argument('-o', '--output', default='-', help="file to write (default: stdout)")
+    parser.add_argument('--chunk-size', type=int, default=65536, help="passwords generated per write")
+    args = parser.parse_args(argv)
+
+    if args.length < 4:
+        parser.error("Password length must be at least 4.")
+    if args.chunk_size < 1:
+        parser.error("Chunk size must be at least 1.")
+    alphabet = password_engine.build_alphabet(not args.no_upper, not args.no_lower, not args.no_digits,
+                                              not args.no_symbols, args.exclude_ambiguous)
+    if not alphabet:
+        parser.error("Please select at least one character set.")
+
+    outfile = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        stream_passwords(outfile, args.count, args.length, alphabet, args.chunk_size)
+        outfile.flush()
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head); stop quietly
+        sys.stderr.close()
+    finally:
+        if outfile is not sys.stdout.buffer:
+            outfile.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import string
+
+AMBIGUOUS = 'l1I0O'
+
+
+def build_alphabet(upper=True, lower=True, digits=True, symbols=True, exclude_ambiguous=False):
+    chars = ''
+    if upper: chars += string.ascii_uppercase
+    if lower: chars += string.ascii_lowercase
+    if digits: chars += string.digits
+    if symbols: chars += string.punctuation
+    if exclude_ambiguous:
+        chars = ''.join(c for c in chars if c not in AMBIGUOUS)
+    return chars
+
+
+class Sampler:
+    # Maps uniformly random bytes onto an alphabet. Bytes at or above the
+    # largest multiple of len(alphabet) are dropped (rejection sampling), so
+    # every character is equally likely; bytes.translate does both the
+    # mapping and the rejection in C.
+    def __init__(self, alphabet, randbytes=os.urandom):
+        if not alphabet:
+            raise ValueError("Please select at least one character set.")
+        if len(alphabet) > 256 or not alphabet.isascii():
+            raise ValueError("Alphabet must be at most 256 ASCII characters.")
+        self.alphabet = alphabet
+        self.randbytes = randbytes
+        size = len(alphabet)
+        self.limit = 256 - 256 % size
+        encoded = alphabet.encode('ascii')
+        self.table = bytes(encoded[b % size] for b in range(256))
+        self.reject = bytes(range(self.limit, 256))
+
+    def chars(self, count):
+        # `count` random alphabet characters as ASCII bytes
+        out = bytearray()
+        while len(out) < count:
+            missing = count - len(out)
+            block = self.randbytes(missing * 256 // self.limit + 16)
+            out += block.translate(self.table, self.reject)
+        del out[count:]
+        return bytes(out)
+
+    def block(self, count, length, separator=b'\n'):
+        # `count` passwords of `length` characters, each followed by separator
+        if not separator:
+            return self.chars(count * length)
+        data = self.chars(count * length)
+        lines = bytearray(count * (length + len(separator)))
+        step = length + len(separator)
+        for i in range(length):
+            lines[i::step] = data[i::length]
+        for i, byte in enumerate(separator):
+            lines[length + i::step] = bytes([byte]) * count
+        return bytes(lines)
+
+    def passwords(self, count, length):
+        data = self.chars(count * length).decode('ascii')
+        return [data[i:i + length] for i in range(0, count * length, length)]
+
+
+def generate_passwords(count, length, alphabet):
+    if length < 1:
+        raise ValueError("Password length must be at least 1.")
+    return Sampler(alphabet).passwords(count, length)
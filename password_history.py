@@ -0,0 +1,174 @@
+import hashlib
+import os
+import struct
+from collections import deque
+
+MAGIC = b'PWHIST03'
+NONCE_SIZE = 12
+TAG_SIZE = 16
+CHECK_SIZE = NONCE_SIZE + TAG_SIZE
+HEADER = struct.Struct(f'<8s16s{CHECK_SIZE}sQQ')    # magic, key salt, key check, record count, end offset
+COUNT_OFFSET = 8 + 16 + CHECK_SIZE
+LENGTH = struct.Struct('<I')        # password length inside a record; record size after it
+BLOCK = 128                         # record plaintext is padded to a multiple of this
+KEY_ENV = 'PASSWORD_HISTORY_KEY'
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.password_history')
+
+
+def derive_key(passphrase, salt):
+    return hashlib.scrypt(passphrase.encode('utf-8'), salt=salt, n=2 ** 14, r=8, p=1, dklen=32)
+
+
+class HistorySpill:
+    # Encrypted append-only file of records, each sealed separately with
+    # AES-GCM and bound to its index. Plaintext is padded to whole blocks so
+    # sizes say little about the passwords, and every record is followed by
+    # its size, so pages are found by walking back from the end: a page of
+    # entries can be read and decrypted without touching the older ones.
+    def __init__(self, path, passphrase):
+        from cryptography.exceptions import InvalidTag
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, 'r+b')
+        header = self._file.read(HEADER.size)
+        if not header:
+            salt = os.urandom(16)
+            self._aead = AESGCM(derive_key(passphrase, salt))
+            # An empty message sealed with the key: opening the file again
+            # with a different passphrase fails here instead of on old pages
+            nonce = os.urandom(NONCE_SIZE)
+            check = nonce + self._aead.encrypt(nonce, b'', MAGIC)
+            self._file.write(HEADER.pack(MAGIC, salt, check, 0, HEADER.size))
+            self._count, self._end = 0, HEADER.size
+            self._starts = {}
+            return
+        if len(header) != HEADER.size or header[:8] != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a password history file.")
+        _, salt, check, self._count, self._end = HEADER.unpack(header)
+        self._aead = AESGCM(derive_key(passphrase, salt))
+        try:
+            self._aead.decrypt(check[:NONCE_SIZE], check[NONCE_SIZE:], MAGIC)
+        except InvalidTag:
+            self._file.close()
+            raise ValueError(f"{path} was written with a different ${KEY_ENV}.") from None
+        # Start offsets of the newest entries, filled in as pages are read
+        self._starts = {}
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def append(self, pwd):
+        data = pwd.encode('utf-8')
+        index = self._count
+        plain = LENGTH.pack(len(data)) + data
+        plain += bytes(-len(plain) % BLOCK)
+        nonce = os.urandom(NONCE_SIZE)
+        record = nonce + self._aead.encrypt(nonce, plain, index.to_bytes(8, 'little'))
+        start = self._end
+        self._file.seek(start)
+        self._file.write(record + LENGTH.pack(len(record)))
+        self._starts[index] = start
+        self._count += 1
+        self._end = self._file.tell()
+        # Count and end are updated together after the record, so a torn
+        # append leaves the previous entries intact
+        self._file.seek(COUNT_OFFSET)
+        self._file.write(struct.pack('<QQ', self._count, self._end))
+        self._file.flush()
+
+    def _locate(self, index):
+        # Walks back over record sizes until the start of `index` is known
+        oldest = min(self._starts, default=self._count)
+        position = self._starts.get(oldest, self._end)
+        while oldest > index:
+            self._file.seek(position - LENGTH.size)
+            size, = LENGTH.unpack(self._file.read(LENGTH.size))
+            position -= LENGTH.size + size
+            oldest -= 1
+            self._starts[oldest] = position
+        return self._starts[index]
+
+    def page(self, number, size):
+        # Entries oldest first; page 0 holds the `size` most recently spilled
+        stop = self._count - number * size
+        start = max(stop - size, 0)
+        if stop <= 0:
+            return []
+        base = self._locate(start)
+        self._file.seek(base)
+        raw = self._file.read(self._starts.get(stop, self._end) - base)
+        entries = []
+        for i in range(start, stop):
+            end = self._starts.get(i + 1, self._end) - LENGTH.size - base
+            record = raw[self._starts[i] - base:end]
+            plain = self._aead.decrypt(record[:NONCE_SIZE], record[NONCE_SIZE:], i.to_bytes(8, 'little'))
+            length, = LENGTH.unpack_from(plain)
+            entries.append(plain[LENGTH.size:LENGTH.size + length].decode('utf-8'))
+        return entries
+
+    def pages(self, size):
+        return -(-self._count // size)
+
+
+class PasswordHistory:
+    # The most recent `capacity` passwords in a ring buffer; older ones are
+    # dropped, or moved to an encrypted spill file when one is given.
+    def __init__(self, capacity=5, spill=None):
+        self.capacity = capacity
+        self.spill = spill
+        self._recent = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self._recent)
+
+    def __iter__(self):
+        return iter(self._recent)
+
+    def append(self, pwd):
+        # Returns the entry pushed out of the buffer, or None
+        evicted = self._recent[0] if len(self._recent) == self.capacity else None
+        self._recent.append(pwd)
+        if evicted is not None and self.spill is not None:
+            self.spill.append(evicted)
+        return evicted
+
+    def page_count(self):
+        return 1 + (self.spill.pages(self.capacity) if self.spill is not None else 0)
+
+    def page(self, number):
+        # Oldest first. Page 0 is the buffer; later pages come from the spill
+        # file, reading and decrypting only that page
+        if number == 0:
+            return list(self._recent)
+        if self.spill is None:
+            return []
+        return self.spill.page(number - 1, self.capacity)
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+
+
+def open_spill(path=None):
+    # Spill file keyed by $PASSWORD_HISTORY_KEY; None when no key is set or
+    # the cryptography package is not installed. ValueError when the file is
+    # not a history file or the key does not match it.
+    passphrase = os.environ.get(KEY_ENV)
+    if not passphrase:
+        return None
+    try:
+        return HistorySpill(path or DEFAULT_PATH, passphrase)
+    except ImportError:
+        return None
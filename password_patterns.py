@@ -0,0 +1,210 @@
+import math
+import os
+import re
+import password_strength
+
+WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'password_words.txt')
+MIN_MATCH = 3
+SEGMENT_BITS = 1.0      # cost of starting another pattern in the decomposition
+
+KEYBOARD_ROWS = (
+    ('`1234567890-=', '~!@#$%^&*()_+'),
+    ('qwertyuiop[]\\', 'QWERTYUIOP{}|'),
+    ('asdfghjkl;\'', 'ASDFGHJKL:"'),
+    ('zxcvbnm,./', 'ZXCVBNM<>?'),
+)
+L33T = str.maketrans({'4': 'a', '@': 'a', '3': 'e', '1': 'i', '!': 'i', '0': 'o', '$': 's', '5': 's', '7': 't', '+': 't'})
+
+_YEAR_RE = re.compile(r'19\d\d|20[0-4]\d')
+_DATE_RE = re.compile(r'(\d{1,2})([-/._ ]?)(\d{1,2})\2(\d{4}|\d{2})')
+_REPEAT_RE = re.compile(r'(.+?)\1+')
+
+_tables = None
+
+
+class _Tables:
+    # Built on first use and shared by every call
+    def __init__(self, words_path):
+        self.ranks = {}
+        with open(words_path, encoding='utf-8') as f:
+            for rank, line in enumerate(f, 1):
+                word = line.strip().lower()
+                if word and word not in self.ranks:
+                    self.ranks[word] = rank
+        self.prefixes = {word[:i] for word in self.ranks for i in range(1, len(word) + 1)}
+        self.max_word = max(map(len, self.ranks), default=0)
+
+        # Adjacency on a staggered QWERTY layout; shifted keys share a position
+        position = {}
+        for row, (plain, shifted) in enumerate(KEYBOARD_ROWS):
+            for col, (a, b) in enumerate(zip(plain, shifted)):
+                position[a] = position[b] = (row, col)
+        self.adjacent = {}
+        for char, (row, col) in position.items():
+            self.adjacent[char] = {other for other, (r, c) in position.items()
+                                   if (r, c) != (row, col) and (r, c) in
+                                   ((row, col - 1), (row, col + 1), (row - 1, col), (row - 1, col + 1),
+                                    (row + 1, col - 1), (row + 1, col))}
+        self.keyboard_starts = len({pos for pos in position.values()})
+        self.keyboard_degree = sum(map(len, self.adjacent.values())) / len(self.adjacent)
+
+
+def tables(words_path=None):
+    global _tables
+    if _tables is None or words_path is not None:
+        _tables = _Tables(words_path or os.environ.get('PASSWORD_WORDS', WORDS_PATH))
+    return _tables
+
+
+def _cardinality(token):
+    return password_strength.analyze(token).charset_size or 10
+
+
+def _case_variations(token):
+    upper = sum(c.isupper() for c in token)
+    lower = sum(c.islower() for c in token)
+    if upper == 0:
+        return 1
+    if lower == 0 or (upper == 1 and token[0].isupper()):
+        return 2
+    return sum(math.comb(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def _dictionary_matches(pwd, t):
+    lowered = pwd.lower()
+    unleet = lowered.translate(L33T)
+    n = len(pwd)
+    for candidate, leet in ((lowered, False), (unleet, True)):
+        if leet and candidate == lowered:
+            continue
+        # Words are at least MIN_MATCH long, so the first piece tried is too
+        for i in range(n - MIN_MATCH + 1):
+            for j in range(i + MIN_MATCH, min(n, i + t.max_word) + 1):
+                piece = candidate[i:j]
+                if piece not in t.prefixes:
+                    break
+                if piece in t.ranks:
+                    guesses = t.ranks[piece] * _case_variations(pwd[i:j])
+                    if leet:
+                        changed = sum(a != b for a, b in zip(lowered[i:j], piece))
+                        if not changed:
+                            continue
+                        guesses *= 2 ** changed
+                    yield i, j, guesses, 'dictionary'
+
+
+def _keyboard_matches(pwd, t):
+    adjacent = t.adjacent
+    n = len(pwd)
+    i = 0
+    while i < n - 1:
+        j = i + 1
+        while j < n and pwd[j] in adjacent.get(pwd[j - 1], ()):
+            j += 1
+        if j - i >= MIN_MATCH:
+            length = j - i
+            guesses = t.keyboard_starts * t.keyboard_degree ** (length - 1) / 2
+            yield i, j, max(guesses, length), 'keyboard'
+        i = j if j > i + 1 else i + 1
+
+
+def _sequence_matches(pwd):
+    n = len(pwd)
+    i = 0
+    while i < n - 2:
+        delta = ord(pwd[i + 1]) - ord(pwd[i])
+        j = i + 1
+        if delta in (1, -1):
+            while j < n and ord(pwd[j]) - ord(pwd[j - 1]) == delta:
+                j += 1
+        if j - i >= MIN_MATCH:
+            first = pwd[i]
+            start = 4 if first in 'aAzZ019' else (10 if first.isdigit() else 26)
+            yield i, j, start * (j - i) * (2 if delta < 0 else 1), 'sequence'
+            i = j - 1
+        else:
+            i += 1
+
+
+def _repeat_matches(pwd):
+    for match in _REPEAT_RE.finditer(pwd):
+        base, whole = match.group(1), match.group(0)
+        if len(whole) >= MIN_MATCH:
+            base_guesses = min(_cardinality(base) ** len(base), 10 ** 12)
+            yield match.start(), match.end(), base_guesses * (len(whole) // len(base)), 'repeat'
+
+
+def _date_matches(pwd):
+    for match in _YEAR_RE.finditer(pwd):
+        yield match.start(), match.end(), max(abs(int(match.group()) - 2000), 20), 'date'
+    for match in _DATE_RE.finditer(pwd):
+        a, sep, b, year = match.group(1), match.group(2), match.group(3), match.group(4)
+        a, b = int(a), int(b)
+        if (1 <= a <= 12 and 1 <= b <= 31) or (1 <= b <= 12 and 1 <= a <= 31):
+            year_space = max(abs(int(year) - 2000), 20) if len(year) == 4 else 100
+            yield match.start(), match.end(), 365 * year_space * (4 if sep else 1), 'date'
+
+
+def matches(pwd, words_path=None):
+    t = tables(words_path)
+    yield from _dictionary_matches(pwd, t)
+    yield from _keyboard_matches(pwd, t)
+    yield from _sequence_matches(pwd)
+    yield from _repeat_matches(pwd)
+    yield from _date_matches(pwd)
+
+
+def estimate(pwd, words_path=None):
+    # Cheapest decomposition of pwd into patterns and brute-forced characters,
+    # in bits. Dynamic programming over end positions keeps two states: ending
+    # inside a brute-force run (extending it costs no segment penalty) or
+    # ending on a pattern.
+    n = len(pwd)
+    if n == 0:
+        return 0.0, []
+    char_bits = math.log2(_cardinality(pwd))
+    found = list(matches(pwd, words_path))
+    if not found:
+        # Most random passwords: nothing to decompose
+        return n * char_bits, [('brute', pwd)]
+    by_end = [[] for _ in range(n + 1)]
+    for i, j, guesses, kind in found:
+        by_end[j].append((i, math.log2(guesses), kind))
+
+    inf = float('inf')
+    brute = [inf] * (n + 1)
+    pattern = [inf] * (n + 1)
+    back_brute = [None] * (n + 1)
+    back_pattern = [None] * (n + 1)
+    pattern[0] = 0.0
+    for j in range(1, n + 1):
+        from_brute = brute[j - 1] + char_bits
+        from_pattern = pattern[j - 1] + char_bits + SEGMENT_BITS
+        if from_brute <= from_pattern:
+            brute[j], back_brute[j] = from_brute, ('brute', j - 1, True)
+        else:
+            brute[j], back_brute[j] = from_pattern, ('brute', j - 1, False)
+        for i, bits, kind in by_end[j]:
+            start = min(brute[i], pattern[i])
+            cost = start + bits + SEGMENT_BITS
+            if cost < pattern[j]:
+                pattern[j], back_pattern[j] = cost, (kind, i, brute[i] < pattern[i])
+
+    # Walk back to recover the chosen segments
+    segments = []
+    in_brute = brute[n] < pattern[n]
+    j = n
+    while j > 0:
+        kind, i, prev_brute = (back_brute if in_brute else back_pattern)[j]
+        if kind == 'brute' and segments and segments[-1][0] == 'brute' and segments[-1][1] == j:
+            segments[-1] = ('brute', i, segments[-1][2])
+        else:
+            segments.append((kind, i, j))
+        j, in_brute = i, prev_brute
+    segments.reverse()
+    bits = min(brute[n], pattern[n]) - SEGMENT_BITS
+    return max(bits, 0.0), [(kind, pwd[i:j]) for kind, i, j in segments]
+
+
+def pattern_entropy(pwd, words_path=None):
+    return estimate(pwd, words_path)[0]
@@ -0,0 +1,235 @@
+import secrets
+import string
+import password_engine
+
+CLASSES = {
+    'upper': string.ascii_uppercase,
+    'lower': string.ascii_lowercase,
+    'digits': string.digits,
+    'symbols': string.punctuation,
+}
+REFILL = 4096       # random characters drawn per class at a time
+MAX_DRAWS = 64      # draws at one position before falling back to an explicit choice
+MAX_LAYOUTS = 16    # slot arrangements tried before searching for a password directly
+
+_system = secrets.SystemRandom()
+
+
+def _stream(sampler):
+    # Endless random characters from one alphabet, drawn in bulk
+    while True:
+        yield from sampler.chars(REFILL).decode('ascii')
+
+
+def _below_stream():
+    # Endless uniform integers: send n, receive an integer in range(n). Bytes
+    # at or above the largest multiple of n are rejected, as in Sampler; n
+    # above 256 does not fit a byte and goes to secrets.randbelow.
+    n = yield
+    while True:
+        for b in secrets.token_bytes(REFILL):
+            while n > 256:
+                n = yield secrets.randbelow(n)
+            if b < 256 - 256 % n:
+                n = yield b % n
+
+
+class Policy:
+    # Passwords of `length` characters with at least minimums[name] characters
+    # of each named class, none of `forbidden`, no character repeated more
+    # than max_repeat times in a row and no ascending or descending run (abc,
+    # 321) longer than max_run. Classes missing from `minimums` are not used.
+    def __init__(self, length=12, minimums=None, forbidden='', max_repeat=None, max_run=None):
+        if minimums is None:
+            minimums = {name: 1 for name in CLASSES}
+        self.length = length
+        self.forbidden = forbidden
+        self.max_repeat = max_repeat
+        self.max_run = max_run
+        self.alphabets = {}
+        for name, count in minimums.items():
+            chars = ''.join(c for c in CLASSES[name] if c not in forbidden)
+            if chars:
+                self.alphabets[name] = chars
+            elif count:
+                raise ValueError(f"Every {name} character is forbidden.")
+        self.minimums = {name: minimums[name] for name in self.alphabets}
+        self.alphabet = ''.join(self.alphabets.values())
+        if not self.alphabet:
+            raise ValueError("Please select at least one character set.")
+        if sum(self.minimums.values()) > length:
+            raise ValueError("Password length is shorter than the required characters.")
+        if (max_repeat is not None and max_repeat < 1) or (max_run is not None and max_run < 2):
+            raise ValueError("Repeat limit must be at least 1 and run limit at least 2.")
+
+        # Required slots, then filler slots drawn from the whole alphabet
+        self._required = [name for name, count in self.minimums.items() for _ in range(count)]
+        self._slots = self._required + [None] * (length - len(self._required))
+        self._streams = {name: _stream(password_engine.Sampler(chars)) for name, chars in self.alphabets.items()}
+        self._streams[None] = _stream(password_engine.Sampler(self.alphabet))
+        self._below = _below_stream()
+        next(self._below)
+        self._choices = {**self.alphabets, None: self.alphabet}
+        self._limited = max_repeat is not None or max_run is not None
+        if self._limited and self._search(lambda: self.alphabet) is None:
+            raise ValueError("No password satisfies this policy.")
+
+    def _fits(self, c, prev, repeat, run, step):
+        # (c, repeat length, run length, run step) once c is appended, or None
+        # when that breaks a limit
+        if prev is None:
+            return c, 1, 1, 0
+        repeat = repeat + 1 if c == prev else 1
+        delta = ord(c) - ord(prev)
+        if delta in (1, -1):
+            run = run + 1 if delta == step else 2
+        else:
+            run, delta = 1, 0
+        if self.max_repeat is not None and repeat > self.max_repeat:
+            return None
+        if self.max_run is not None and run > self.max_run:
+            return None
+        return c, repeat, run, delta
+
+    def _search(self, order):
+        # Depth-first search for any password that meets the policy, trying
+        # characters in the order order() gives and remembering states that
+        # cannot be completed. None when no password exists.
+        names = list(self.minimums)
+        class_of = {c: names.index(name) for name, chars in self.alphabets.items() for c in chars}
+        # A one-character class fits at most max_repeat of every
+        # max_repeat + 1 positions; cutting branches that need more keeps
+        # tight policies from being searched character by character
+        singles = [k for k, name in enumerate(names) if len(self.alphabets[name]) == 1]
+        if self.max_repeat is None:
+            singles = []
+        dead = set()
+        path = []
+
+        def extend(pos, need, state):
+            if pos == self.length:
+                return True
+            key = (pos, need, state)
+            if key in dead:
+                return False
+            if singles:
+                left = self.length - pos
+                most = left - left // (self.max_repeat + 1)
+                if any(need[k] > most for k in singles):
+                    dead.add(key)
+                    return False
+            slack = self.length - pos - sum(need)
+            for c in order():
+                k = class_of[c]
+                if need[k]:
+                    rest = need[:k] + (need[k] - 1,) + need[k + 1:]
+                elif slack:
+                    rest = need
+                else:
+                    continue
+                fits = self._fits(c, *state)
+                if fits is None:
+                    continue
+                path.append(c)
+                if extend(pos + 1, rest, fits):
+                    return True
+                path.pop()
+            dead.add(key)
+            return False
+
+        if extend(0, tuple(self.minimums.values()), (None, 0, 0, 0)):
+            return ''.join(path)
+        return None
+
+    def _build(self):
+        if not self._limited:
+            return self._fill()
+        # A random slot arrangement can be impossible to fill (two slots of a
+        # one-character class side by side under max_repeat=1); another
+        # arrangement is drawn then. The direct search is the last resort
+        # and only guarantees a valid password, not a uniform one.
+        for _ in range(MAX_LAYOUTS):
+            pwd = self._fill()
+            if pwd is not None:
+                return pwd
+        return self._search(lambda: _system.sample(self.alphabet, len(self.alphabet)))
+
+    def _fill(self):
+        # One password over a shuffled slot arrangement, or None when the
+        # arrangement leads to a position no character can fill
+        slots = self._slots[:]
+        below = self._below.send
+        # Fisher-Yates: every arrangement of the class slots is equally likely
+        for i in range(len(slots) - 1, 0, -1):
+            j = below(i + 1)
+            slots[i], slots[j] = slots[j], slots[i]
+
+        streams = self._streams
+        if not self._limited:
+            return ''.join([next(streams[slot]) for slot in slots])
+
+        chars = []
+        prev, repeat, run, step = None, 0, 0, 0
+        for slot in slots:
+            stream = streams[slot]
+            # Skipping characters that break a limit samples uniformly from
+            # the characters that keep it; only this position is redrawn
+            for _ in range(MAX_DRAWS):
+                state = self._fits(next(stream), prev, repeat, run, step)
+                if state is not None:
+                    break
+            else:
+                allowed = [c for c in self._choices[slot] if self._fits(c, prev, repeat, run, step)]
+                if not allowed:
+                    return None
+                c = allowed[secrets.randbelow(len(allowed))]
+                state = self._fits(c, prev, repeat, run, step)
+            prev, repeat, run, step = state
+            chars.append(prev)
+        return ''.join(chars)
+
+    def generate(self, count=1):
+        return [self._build() for _ in range(count)]
+
+    def check(self, pwd):
+        if len(pwd) != self.length:
+            return False
+        for name, count in self.minimums.items():
+            alphabet = self.alphabets[name]
+            if sum(c in alphabet for c in pwd) < count:
+                return False
+        if any(c not in self.alphabet for c in pwd):
+            return False
+        prev, repeat, run, step = None, 0, 0, 0
+        for c in pwd:
+            state = self._fits(c, prev, repeat, run, step)
+            if state is None:
+                return False
+            prev, repeat, run, step = state
+        return True
+
+
+def from_options(length, upper=True, lower=True, digits=True, symbols=True, exclude_ambiguous=False,
+                 max_repeat=None, max_run=None):
+    # One character of every selected class, as the generator window offers
+    selected = {'upper': upper, 'lower': lower, 'digits': digits, 'symbols': symbols}
+    minimums = {name: 1 for name, use in selected.items() if use}
+    if len(minimums) > length:
+        minimums = dict.fromkeys(minimums, 0)
+    return Policy(length, minimums, password_engine.AMBIGUOUS if exclude_ambiguous else '',
+                  max_repeat, max_run)
+
+
+def generate_and_test(policy, count):
+    # The old approach, for comparison: sample from the whole alphabet and
+    # retry until a password passes. Returns the passwords and the retries.
+    sampler = password_engine.Sampler(policy.alphabet)
+    out = []
+    retries = 0
+    while len(out) < count:
+        for pwd in sampler.passwords(count - len(out), policy.length):
+            if policy.check(pwd):
+                out.append(pwd)
+            else:
+                retries += 1
+    return out, retries
@@ -0,0 +1,100 @@
+import math
+import string
+
+UPPER, LOWER, DIGIT, SYMBOL = 'U', 'L', 'D', 'S'
+
+# ASCII characters translate to one class letter each; other ASCII characters
+# (space, control codes) are dropped and non-ASCII ones pass through unchanged
+# to be classified individually.
+_CLASS_TABLE = {c: None for c in range(128)}
+_CLASS_TABLE.update({ord(c): UPPER for c in string.ascii_uppercase})
+_CLASS_TABLE.update({ord(c): LOWER for c in string.ascii_lowercase})
+_CLASS_TABLE.update({ord(c): DIGIT for c in string.digits})
+_CLASS_TABLE.update({ord(c): SYMBOL for c in string.punctuation})
+_CLASS_LETTERS = {UPPER, LOWER, DIGIT, SYMBOL}
+
+RATINGS = (
+    ("Very Weak", "darkred", 20),
+    ("Weak", "red", 40),
+    ("Moderate", "orange", 60),
+    ("Strong", "green", 80),
+    ("Very Strong", "darkgreen", 100),
+)
+
+
+class PasswordAnalysis:
+    __slots__ = ('length', 'has_upper', 'has_lower', 'has_digit', 'has_symbol', 'breached',
+                 'pwd', 'patterns', 'generated', '_entropy')
+
+    def __init__(self, pwd, blocklist=None, patterns=False, entropy=None):
+        classes = set(pwd.translate(_CLASS_TABLE))
+        extra = classes - _CLASS_LETTERS
+        for c in extra:
+            if c.isupper():
+                classes.add(UPPER)
+            elif c.islower():
+                classes.add(LOWER)
+            elif c.isdigit():
+                classes.add(DIGIT)
+        self.length = len(pwd)
+        self.has_upper = UPPER in classes
+        self.has_lower = LOWER in classes
+        self.has_digit = DIGIT in classes
+        self.has_symbol = SYMBOL in classes
+        self.breached = blocklist is not None and pwd in blocklist
+        self.pwd = pwd
+        self.patterns = patterns
+        # Entropy known from how the password was generated (a passphrase's
+        # word count and list size) replaces the estimate
+        self.generated = entropy is not None
+        self._entropy = entropy
+
+    @property
+    def score(self):
+        return self.has_upper + self.has_lower + self.has_digit + self.has_symbol
+
+    @property
+    def charset_size(self):
+        size = 0
+        if self.has_upper: size += 26
+        if self.has_lower: size += 26
+        if self.has_digit: size += 10
+        if self.has_symbol: size += len(string.punctuation)
+        return size
+
+    @property
+    def entropy(self):
+        if self._entropy is None:
+            size = self.charset_size
+            self._entropy = self.length * math.log2(size) if size else 0
+            if self.patterns and self._entropy:
+                # Words, keyboard walks, dates and repeats cut the search space
+                import password_patterns
+                self._entropy = min(self._entropy, password_patterns.pattern_entropy(self.pwd))
+        return self._entropy
+
+    @property
+    def rating_index(self):
+        if self.breached:
+            return 0
+        length, score, entropy = self.length, self.score, self.entropy
+        if self.generated:
+            # Character classes say nothing about a random choice of words
+            return (entropy >= 80) + (entropy >= 60) + (entropy >= 40) + (entropy >= 28)
+        if length >= 16 and score == 4 and entropy >= 80:
+            return 4
+        elif length >= 12 and score == 4 and entropy >= 60:
+            return 3
+        elif length >= 8 and score >= 3 and entropy >= 40:
+            return 2
+        elif length >= 6 and score >= 2:
+            return 1
+        return 0
+
+    @property
+    def rating(self):
+        return RATINGS[self.rating_index]
+
+
+def analyze(pwd, blocklist=None, patterns=False, entropy=None):
+    return PasswordAnalysis(pwd, blocklist, patterns, entropy)
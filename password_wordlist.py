@@ -0,0 +1,153 @@
+import argparse
+import gzip
+import math
+import mmap
+import os
+import secrets
+import struct
+import sys
+
+MAGIC = b'PWWORDS1'
+HEADER = struct.Struct('<8sQ')      # magic, number of words
+OFFSET = struct.Struct('<I')        # words are followed by count + 1 offsets into the blob
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlist.idx')
+# Webster's Second International (public domain, as shipped in BSD's
+# /usr/share/dict/web2), lowercased: 119,621 words of 3 to 9 letters
+BUNDLED_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'passphrase_words.txt.gz')
+
+
+class Wordlist:
+    # Words in one UTF-8 blob with a table of where each starts, memory-mapped
+    # so picking a word reads two offsets and its bytes; nothing is loaded up
+    # front.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or self._count == 0:
+            self.close()
+            raise ValueError(f"{path} is not a passphrase wordlist.")
+        self._blob = HEADER.size + (self._count + 1) * OFFSET.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("word index out of range")
+        start, end = struct.unpack_from('<II', self._mm, HEADER.size + index * OFFSET.size)
+        return self._mm[self._blob + start:self._blob + end].decode('utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def choice(self):
+        return self[secrets.randbelow(self._count)]
+
+
+_default = None
+
+
+def default():
+    # Shared wordlist from $PASSWORD_WORDLIST or wordlist.idx next to this
+    # file, which is built from the bundled words on first use. None when
+    # there is no wordlist and it cannot be built.
+    global _default
+    if _default is None:
+        path = os.environ.get('PASSWORD_WORDLIST', DEFAULT_PATH)
+        if not os.path.exists(path) and path == DEFAULT_PATH and os.path.exists(BUNDLED_SOURCE):
+            try:
+                build(BUNDLED_SOURCE, path)
+            except OSError:
+                pass
+        _default = Wordlist(path) if os.path.exists(path) else False
+    return _default or None
+
+
+def passphrase_entropy(list_size, words, digit=False):
+    # Bits chosen at random: each word, plus the digit and the word it follows.
+    # Capitalization and the separator are fixed, so they add nothing. With
+    # an empty separator this is an upper bound: different word choices can
+    # spell the same passphrase (pin + kin and pink + in), so an attacker
+    # has fewer distinct strings to try.
+    bits = words * math.log2(list_size)
+    if digit:
+        bits += math.log2(10 * words)
+    return bits
+
+
+def generate_passphrase(wordlist, words=6, separator='-', capitalize=False, digit=False):
+    if words < 1:
+        raise ValueError("A passphrase needs at least one word.")
+    chosen = [wordlist.choice() for _ in range(words)]
+    if capitalize:
+        chosen = [word.capitalize() for word in chosen]
+    if digit:
+        chosen[secrets.randbelow(words)] += str(secrets.randbelow(10))
+    return separator.join(chosen)
+
+
+def build(source, output, min_length=3, max_length=9):
+    # Unique lowercase alphabetic words of source, one per line, in file
+    # order. A source ending in .gz is read through gzip.
+    seen = set()
+    words = []
+    opener = gzip.open if source.endswith('.gz') else open
+    with opener(source, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            word = line.strip().lower()
+            if min_length <= len(word) <= max_length and word.isalpha() and word not in seen:
+                seen.add(word)
+                words.append(word.encode('utf-8'))
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    with open(output + '.tmp', 'wb') as out:
+        out.write(HEADER.pack(MAGIC, len(words)))
+        out.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        out.write(b''.join(words))
+    os.replace(output + '.tmp', output)
+    return len(words)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a passphrase wordlist or generate passphrases from one.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_cmd = commands.add_parser('build', help="build a wordlist from a text file, one word per line")
+    build_cmd.add_argument('source', nargs='?', default=BUNDLED_SOURCE)
+    build_cmd.add_argument('output', nargs='?', default=DEFAULT_PATH)
+    build_cmd.add_argument('--min-length', type=int, default=3)
+    build_cmd.add_argument('--max-length', type=int, default=9)
+    gen_cmd = commands.add_parser('generate', help="print passphrases")
+    gen_cmd.add_argument('wordlist', nargs='?', default=DEFAULT_PATH)
+    gen_cmd.add_argument('-n', '--count', type=int, default=1)
+    gen_cmd.add_argument('-w', '--words', type=int, default=6)
+    gen_cmd.add_argument('-s', '--separator', default='-')
+    gen_cmd.add_argument('--capitalize', action='store_true')
+    gen_cmd.add_argument('--digit', action='store_true', help="append a random digit to one word")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build(args.source, args.output, args.min_length, args.max_length)
+        print(f"{count} words written to {args.output}")
+    else:
+        with Wordlist(args.wordlist) as wordlist:
+            for _ in range(args.count):
+                print(generate_passphrase(wordlist, args.words, args.separator, args.capitalize, args.digit))
+            print(f"{passphrase_entropy(len(wordlist), args.words, args.digit):.1f} bits each", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import subprocess
+import sys
+
+# Modules that must import without pulling in a GUI toolkit, and their
+# cumulative import-time budget in milliseconds.
+BUDGETS_MS = {
+    'calc_core': 50,
+    'Calculator': 50,
+    'calc_cli': 50,
+}
+GUI_MODULES = ('tkinter', '_tkinter')
+
+
+def import_times(module):
+    # Parses `python -X importtime` output into {name: cumulative_us}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check(module, runs=3):
+    best = None
+    gui = []
+    for _ in range(runs):
+        times = import_times(module)
+        gui = [name for name in times if name in GUI_MODULES]
+        total = times.get(module, 0) / 1000
+        best = total if best is None else min(best, total)
+    return best, gui
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check headless import time of the calculator modules.")
+    parser.add_argument('--budget-ms', type=float, help="override the budget for every module")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        budget = args.budget_ms or budget
+        elapsed, gui = check(module)
+        status = 'ok'
+        if gui:
+            status = f"FAIL (imports {', '.join(gui)})"
+        elif elapsed > budget:
+            status = f"FAIL (over {budget:g} ms)"
+        failed = failed or status != 'ok'
+        print(f"{module:12} {elapsed:8.1f} ms  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
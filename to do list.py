@@ -1,39 +1,231 @@
 import sys
-import json
+from bisect import bisect_left
 from PyQt5 import QtCore, QtGui, QtWidgets
+import todo_journal
+import todo_search
+import todo_sqlite
+import todo_store
+
+LAYOUT_BATCH = 1000
+ROLES = frozenset((QtCore.Qt.DisplayRole, QtCore.Qt.FontRole, QtCore.Qt.ForegroundRole))
 
 class TodoModel(QtCore.QAbstractListModel):
     def __init__(self, *args, todos=None, **kwargs):
         super(TodoModel, self).__init__(*args, **kwargs)
-        self.todos = todos or []
-        self.filtered_todos = self.todos  # For search filtering
+        # Shared by every row: data() runs many times per repaint.
+        # Built here because QFont needs the application to exist.
+        done_font = QtGui.QFont()
+        done_font.setStrikeOut(True)
+        self.fonts = (QtGui.QFont(), done_font)  # Indexed by done
+        self.done_brush = QtGui.QBrush(QtGui.QColor('gray'))
+        self.store = todo_store.TodoStore(todos or [])
+        self.search_index = todo_search.SearchIndex(self.store.texts)
+        self.query = ""
+        self.rows = list(range(len(self.store.ids)))  # Store slots of the tasks shown, ascending
+        self.journal = None  # Records every change when set
 
     def data(self, index, role):
-        row = index.row()
-        status, text = self.filtered_todos[row]
-
+        if role not in ROLES:
+            return None
+        slot = self.rows[index.row()]
         if role == QtCore.Qt.DisplayRole:
-            return text
+            return self.store.texts[slot]
+        return self.styled(role, self.store.done[slot])
 
+    def styled(self, role, status):
         if role == QtCore.Qt.FontRole:
-            font = QtGui.QFont()
-            if status:
-                font.setStrikeOut(True)
-            return font
+            return self.fonts[1 if status else 0]
+        return self.done_brush if status else None
+
+    def rowCount(self, index):
+        return len(self.rows)
+
+    def set_store(self, store):
+        # A replayed journal leaves tombstones for tasks removed since the
+        # snapshot; rows and the search index only know live slots
+        if store.wasted():
+            store.compact()
+        self.beginResetModel()
+        self.store = store
+        self.search_index = todo_search.SearchIndex(self.store.texts)
+        self.query = ""
+        self.rows = list(range(len(self.store.ids)))
+        self.endResetModel()
+
+    def filter(self, query):
+        # A query containing the previous one can only narrow its result
+        narrowing = self.query and self.query.lower() in query.lower()
+        rows = self.search_index.search(query, self.rows if narrowing else None)
+        self.query = query
+        changes = todo_search.row_changes(self.rows, rows)
+        if changes is None:
+            self.beginResetModel()
+            self.rows = rows
+            self.endResetModel()
+            return
+        parent = QtCore.QModelIndex()
+        for change, row, items in changes:
+            if change == 'remove':
+                self.beginRemoveRows(parent, row, row + len(items) - 1)
+                del self.rows[row:row + len(items)]
+                self.endRemoveRows()
+            else:
+                self.beginInsertRows(parent, row, row + len(items) - 1)
+                self.rows[row:row] = items
+                self.endInsertRows()
+
+    def matches(self, text):
+        return self.query.lower() in text.lower()
+
+    def task_id(self, row):
+        return self.store.ids[self.rows[row]]
+
+    def todo(self, task_id):
+        return self.store.get(task_id)
+
+    def _row_of(self, slot):
+        # View row showing a store slot, or None when it is filtered out
+        row = bisect_left(self.rows, slot)
+        return row if row < len(self.rows) and self.rows[row] == slot else None
+
+    def add_todo(self, text):
+        task_id = self.store.add(text)
+        slot = self.search_index.add(text)
+        if self.journal is not None:
+            self.journal.add(task_id, text)
+        if self.matches(text):
+            row = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.rows.append(slot)
+            self.endInsertRows()
+        return task_id
+
+    def set_todo(self, task_id, status, text):
+        slot = self.store.slot_of[task_id]
+        self.store.set(task_id, status, text)
+        self.search_index.update(slot, text)
+        if self.journal is not None:
+            self.journal.set(task_id, status, text)
+        row = self._row_of(slot)
+        if row is None:
+            if self.matches(text):
+                row = bisect_left(self.rows, slot)
+                self.beginInsertRows(QtCore.QModelIndex(), row, row)
+                self.rows.insert(row, slot)
+                self.endInsertRows()
+        elif self.matches(text):
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        else:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+
+    def remove_todo(self, task_id):
+        slot = self.store.remove(task_id)
+        self.search_index.remove(slot)
+        if self.journal is not None:
+            self.journal.remove(task_id)
+        row = self._row_of(slot)
+        if row is not None:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.rows[row]
+            self.endRemoveRows()
+        if self.store.needs_compaction():
+            # Same rows in the same order, only their slots change
+            moved = self.store.compact()
+            self.rows = [moved[slot] for slot in self.rows]
+            self.search_index = todo_search.SearchIndex(self.store.texts)
+
+class SqliteTodoModel(TodoModel):
+    # Rows come from an SqliteTodoStore a page at a time as the view scrolls,
+    # so only the pages seen so far are held in memory
+    def __init__(self, store, *args, **kwargs):
+        super(SqliteTodoModel, self).__init__(*args, **kwargs)
+        self.store = store
+        self.loaded = []  # (id, done, text) of the rows fetched so far, ascending id
+        self.ids = []
+        self.exhausted = False
 
-        if role == QtCore.Qt.ForegroundRole:
-            if status:
-                return QtGui.QBrush(QtGui.QColor('gray'))
+    def data(self, index, role):
+        if role not in ROLES:
+            return None
+        task_id, status, text = self.loaded[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return text
+        return self.styled(role, status)
 
     def rowCount(self, index):
-        return len(self.filtered_todos)
+        return len(self.loaded)
+
+    def canFetchMore(self, index):
+        return not self.exhausted
+
+    def fetchMore(self, index):
+        after = self.ids[-1] if self.ids else 0
+        page = self.store.page(self.query, after, todo_sqlite.PAGE_SIZE)
+        if len(page) < todo_sqlite.PAGE_SIZE:
+            self.exhausted = True
+        if page:
+            first = len(self.loaded)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page) - 1)
+            self.loaded += page
+            self.ids += [row[0] for row in page]
+            self.endInsertRows()
 
     def filter(self, query):
-        self.filtered_todos = [todo for todo in self.todos if query.lower() in todo[1].lower()]
-        self.layoutChanged.emit()
+        # Matches come from the full-text index; the view fetches the pages
+        self.beginResetModel()
+        self.query = query
+        self.loaded = []
+        self.ids = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def task_id(self, row):
+        return self.ids[row]
+
+    def _loaded_row(self, task_id):
+        row = bisect_left(self.ids, task_id)
+        return row if row < len(self.ids) and self.ids[row] == task_id else None
+
+    def add_todo(self, text):
+        task_id = self.store.add(text)
+        # Rows not fetched yet arrive with their page; this one is last in id order
+        if self.exhausted and self.matches(text):
+            row = len(self.loaded)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.loaded.append((task_id, False, text))
+            self.ids.append(task_id)
+            self.endInsertRows()
+        return task_id
+
+    def set_todo(self, task_id, status, text):
+        self.store.set(task_id, status, text)
+        row = self._loaded_row(task_id)
+        if row is None:
+            return
+        if self.matches(text):
+            self.loaded[row] = (task_id, status, text)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        else:
+            self._drop_row(row)
+
+    def remove_todo(self, task_id):
+        self.store.remove(task_id)
+        row = self._loaded_row(task_id)
+        if row is not None:
+            self._drop_row(row)
+
+    def _drop_row(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.loaded[row]
+        del self.ids[row]
+        self.endRemoveRows()
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(self, sqlite_path=None):
         super(MainWindow, self).__init__()
         self.setWindowTitle("Advanced To-Do List App")
         self.setGeometry(100, 100, 400, 400)
@@ -54,6 +246,11 @@ class MainWindow(QtWidgets.QMainWindow):
         # Todo list view
         self.todoView = QtWidgets.QListView()
         self.todoView.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        # Every row is one line of text: skip per-row size hints and lay out
+        # in batches so large lists stay responsive
+        self.todoView.setUniformItemSizes(True)
+        self.todoView.setLayoutMode(QtWidgets.QListView.Batched)
+        self.todoView.setBatchSize(LAYOUT_BATCH)
         self.layout.addWidget(self.todoView)
 
         # Input layout
@@ -89,15 +286,26 @@ class MainWindow(QtWidgets.QMainWindow):
         self.layout.addLayout(self.button_layout)
 
         # Model setup
-        self.model = TodoModel()
-        self.load()
+        if sqlite_path:
+            self.storage = todo_sqlite.SqliteTodoStore(sqlite_path)
+            self.model = SqliteTodoModel(self.storage)
+            self.import_json()
+        else:
+            self.storage = todo_journal.TodoJournal('todos.json')
+            self.model = TodoModel()
+            self.load()
         self.todoView.setModel(self.model)
 
+        # Journalled changes are fsynced together once the timer fires
+        self.flushTimer = QtCore.QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(todo_journal.FLUSH_MS)
+        self.flushTimer.timeout.connect(self.flush)
+
     def add(self):
         text = self.todoEdit.text()
         if text:
-            self.model.todos.append((False, text))
-            self.model.filter(self.searchEdit.text())  # Refresh filter
+            self.model.add_todo(text)
             self.todoEdit.setText("")
             self.save()
 
@@ -106,13 +314,11 @@ class MainWindow(QtWidgets.QMainWindow):
         if indexes:
             index = indexes[0]
             row = index.row()
-            status, text = self.model.filtered_todos[row]  # Use filtered for accuracy
+            task_id = self.model.task_id(row)
+            status, text = self.model.todo(task_id)
             new_text, ok = QtWidgets.QInputDialog.getText(self, "Edit Task", "New text:", QtWidgets.QLineEdit.Normal, text)
             if ok and new_text:
-                # Update in original todos
-                original_row = self.model.todos.index(self.model.filtered_todos[row])
-                self.model.todos[original_row] = (status, new_text)
-                self.model.filter(self.searchEdit.text())
+                self.model.set_todo(task_id, status, new_text)
                 self.save()
 
     def delete(self):
@@ -120,9 +326,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if indexes:
             index = indexes[0]
             row = index.row()
-            # Remove from original todos
-            del self.model.todos[self.model.todos.index(self.model.filtered_todos[row])]
-            self.model.filter(self.searchEdit.text())
+            self.model.remove_todo(self.model.task_id(row))
             self.todoView.clearSelection()
             self.save()
 
@@ -131,11 +335,9 @@ class MainWindow(QtWidgets.QMainWindow):
         if indexes:
             index = indexes[0]
             row = index.row()
-            status, text = self.model.filtered_todos[row]
-            # Update in original
-            original_row = self.model.todos.index(self.model.filtered_todos[row])
-            self.model.todos[original_row] = (not status, text)  # Toggle complete
-            self.model.filter(self.searchEdit.text())
+            task_id = self.model.task_id(row)
+            status, text = self.model.todo(task_id)
+            self.model.set_todo(task_id, not status, text)  # Toggle complete
             self.todoView.clearSelection()
             self.save()
 
@@ -154,19 +356,52 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setStyleSheet("")
 
     def load(self):
+        # Starting with an empty list would overwrite the saved one, so files
+        # that cannot be opened stop the program instead
         try:
-            with open('todos.json', 'r') as f:
-                self.model.todos = json.load(f)
-            self.model.filter("")
-        except Exception:
-            pass
+            store = self.storage.load()
+        except OSError as exc:
+            QtWidgets.QMessageBox.critical(self, "Cannot Load Tasks", f"{exc}\n\nNothing was changed on disk.")
+            raise SystemExit(1)
+        if self.storage.recovered:
+            QtWidgets.QMessageBox.warning(
+                self, "Tasks Recovered",
+                f"todos.json could not be read and was moved to {self.storage.recovered}. "
+                "The list was rebuilt from the journal and may be incomplete.")
+        self.model.set_store(store)
+        self.model.journal = self.storage
+
+    def import_json(self):
+        # First run with SQLite: bring over the tasks kept in todos.json
+        if not self.storage.page(limit=1):
+            try:
+                journal = todo_journal.TodoJournal('todos.json')
+                records = journal.load().records()
+                journal.close()
+                self.storage.import_records(records)
+            except Exception:
+                pass
 
     def save(self):
-        with open('todos.json', 'w') as f:
-            json.dump(self.model.todos, f)
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def flush(self):
+        self.storage.flush()
+        self.storage.maybe_compact(self.model.store)
+
+    def closeEvent(self, event):
+        self.storage.close()
+        super(MainWindow, self).closeEvent(event)
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    # --sqlite [path] keeps tasks in an SQLite database instead of todos.json
+    sqlite_path = None
+    if '--sqlite' in sys.argv:
+        position = sys.argv.index('--sqlite')
+        following = sys.argv[position + 1:position + 2]
+        sqlite_path = following[0] if following and not following[0].startswith('-') else 'todos.db'
+    window = MainWindow(sqlite_path)
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,174 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import time
+import todo_search
+
+WORDS = ('buy milk call mom fix bug write report email team clean kitchen book flight pay rent review '
+         'pull request water plants meeting notes renew passport backup laptop update budget').split()
+QUERIES = ('review pull', 'bug', 'passport', '#4242', 'zzz')
+
+
+def task_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f' #{i}' for i in range(count)]
+
+
+def naive_keystrokes(texts, query):
+    # What TodoModel.filter did: lowercase every task again on each keystroke
+    for end in range(1, len(query) + 1):
+        typed = query[:end].lower()
+        rows = [i for i, text in enumerate(texts) if typed in text.lower()]
+    return rows
+
+
+def indexed_keystrokes(index, query):
+    # Each keystroke narrows the previous result, as TodoModel.filter does
+    rows = list(range(len(index)))
+    previous = ''
+    for end in range(1, len(query) + 1):
+        typed = query[:end]
+        new = index.search(typed, rows if previous and previous.lower() in typed.lower() else None)
+        changes = todo_search.row_changes(rows, new)
+        rows, previous = new, typed
+    return rows, None if changes is None else len(changes)
+
+
+def run(size, seed=0):
+    texts = task_texts(size, seed)
+    start = time.perf_counter()
+    index = todo_search.SearchIndex(texts)
+    results = {'size': size, 'index_build_ms': (time.perf_counter() - start) * 1e3, 'queries': []}
+    for query in QUERIES:
+        start = time.perf_counter()
+        expected = naive_keystrokes(texts, query)
+        naive = time.perf_counter() - start
+        start = time.perf_counter()
+        rows, changes = indexed_keystrokes(index, query)
+        indexed = time.perf_counter() - start
+        assert rows == expected, query
+        results['queries'].append({
+            'query': query,
+            'matches': len(rows),
+            'naive_ms_per_key': naive / len(query) * 1e3,
+            'indexed_ms_per_key': indexed / len(query) * 1e3,
+            'last_key_row_changes': changes if changes is not None else 'reset',
+        })
+    return results
+
+
+def load_app():
+    # "to do list.py" is run as a script; load it under an importable name
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'to do list.py')
+    spec = importlib.util.spec_from_file_location('todo_app', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def repaint(rows=100_000, frames=300, seed=0):
+    # Scrolls a QListView through the whole list on the offscreen platform,
+    # timing each frame: pending events (batched layout) plus a synchronous
+    # repaint of the viewport.
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtCore, QtGui, QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    todo_app = load_app()
+
+    class AllocatingModel(todo_app.TodoModel):
+        # data() as it was: new QFont/QBrush objects on every call
+        def data(self, index, role):
+            slot = self.rows[index.row()]
+            status, text = self.store.done[slot], self.store.texts[slot]
+            if role == QtCore.Qt.DisplayRole:
+                return text
+            if role == QtCore.Qt.FontRole:
+                font = QtGui.QFont()
+                if status:
+                    font.setStrikeOut(True)
+                return font
+            if role == QtCore.Qt.ForegroundRole:
+                if status:
+                    return QtGui.QBrush(QtGui.QColor('gray'))
+
+    rng = random.Random(seed)
+    todos = [(rng.random() < 0.3, text) for text in task_texts(rows, seed)]
+    results = []
+    for name, model_class, uniform in (('allocating_per_row_sizes', AllocatingModel, False),
+                                       ('cached_per_row_sizes', todo_app.TodoModel, False),
+                                       ('cached_uniform_batched', todo_app.TodoModel, True)):
+        model = model_class(todos=todos)
+        view = QtWidgets.QListView()
+        if uniform:
+            view.setUniformItemSizes(True)
+            view.setLayoutMode(QtWidgets.QListView.Batched)
+            view.setBatchSize(todo_app.LAYOUT_BATCH)
+        view.resize(400, 600)
+        start = time.perf_counter()
+        view.setModel(model)
+        view.show()
+        app.processEvents()
+        setup = time.perf_counter() - start
+
+        bar = view.verticalScrollBar()
+        step = max(1, bar.maximum() // frames)
+        timings = []
+        for frame in range(frames):
+            start = time.perf_counter_ns()
+            bar.setValue(min(frame * step, bar.maximum()))
+            app.processEvents()
+            view.viewport().repaint()
+            timings.append(time.perf_counter_ns() - start)
+        view.close()
+        timings.sort()
+        results.append({
+            'name': name,
+            'rows': rows,
+            'setup_ms': setup * 1e3,
+            'frame_ms_mean': sum(timings) / len(timings) / 1e6,
+            'frame_ms_p50': timings[len(timings) // 2] / 1e6,
+            'frame_ms_p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1e6,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the to-do list search.")
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="write results to this JSON file")
+    parser.add_argument('--repaint', action='store_true',
+                        help="time scrolling and repainting the list view instead (needs PyQt5)")
+    parser.add_argument('--rows', type=int, default=100_000, help="tasks in the repaint benchmark")
+    parser.add_argument('--frames', type=int, default=300, help="frames in the repaint benchmark")
+    args = parser.parse_args(argv)
+
+    if args.repaint:
+        results = repaint(args.rows, args.frames, args.seed)
+        for row in results:
+            print(f"{row['name']:26} setup {row['setup_ms']:8.1f} ms  frame mean {row['frame_ms_mean']:6.2f} ms  "
+                  f"p50 {row['frame_ms_p50']:6.2f} ms  p99 {row['frame_ms_p99']:6.2f} ms")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'seed': args.seed, 'repaint': results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+        return
+
+    results = []
+    for size in args.sizes:
+        result = run(size, args.seed)
+        results.append(result)
+        print(f"{size:,} tasks (index {result['index_build_ms']:.1f} ms)")
+        for row in result['queries']:
+            print(f"  {row['query']!r:16} {row['matches']:9,} matches  naive {row['naive_ms_per_key']:8.2f} ms/key  "
+                  f"indexed {row['indexed_ms_per_key']:8.2f} ms/key")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
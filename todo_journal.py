@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import todo_store
+
+FLUSH_MS = 200          # longest an operation waits before its batch is fsynced
+BATCH_SIZE = 64         # operations that trigger a flush without waiting
+COMPACT_MIN_OPS = 1000  # journal length before a snapshot is considered
+
+
+def _write_atomic(path, data):
+    # Readers see the old file or the new one, never a partial write
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class TodoJournal:
+    # Persists a TodoStore as a snapshot plus an append-only journal of the
+    # operations since. Each operation is one JSON line with a sequence
+    # number, so saving costs the size of the change, not the list.
+    # Operations are fsynced in batches, and once the journal outgrows the
+    # list a background thread writes a new snapshot and the journal is cut
+    # back to what came after it.
+    def __init__(self, path='todos.json'):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.pending = []
+        self._file = None
+        self._journal_ops = 0
+        self._compaction = None     # thread writing a snapshot
+        self._compacted = None      # (seq, journal offset) once it is written
+        self.recovered = None       # where load moved an unreadable snapshot
+
+    def load(self):
+        # Snapshot, then every journalled operation newer than it. A snapshot
+        # that cannot be read is moved aside (todos.json.corrupt) and the
+        # list is rebuilt from the journal alone; self.recovered names the
+        # moved file. Nothing on disk is ever truncated except a torn final
+        # journal line.
+        store = todo_store.TodoStore()
+        self.recovered = None
+        try:
+            self._read_snapshot(store)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            self.recovered = self._move_aside(self.path)
+            store = todo_store.TodoStore()
+            self.snapshot_seq = 0
+        self.seq = self.snapshot_seq
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                good = 0
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn final write: cut it off so appends start clean
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    try:
+                        entry = json.loads(line)
+                        if entry['seq'] <= self.snapshot_seq:
+                            continue
+                        self._apply(store, entry)
+                    except (ValueError, KeyError, TypeError):
+                        # A damaged line costs that one operation only
+                        continue
+                    self.seq = entry['seq']
+                    self._journal_ops += 1
+        self._file = open(self.journal_path, 'ab')
+        return store
+
+    def _read_snapshot(self, store):
+        with open(self.path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if isinstance(snapshot, list):
+            # Plain list of [done, text] from before the journal existed
+            for done, text in snapshot:
+                store.add(text, done)
+        else:
+            self.snapshot_seq = snapshot['seq']
+            for done, text, task_id in snapshot['todos']:
+                store.add(text, done, task_id)
+            store.next_id = max(store.next_id, snapshot['next_id'])
+
+    @staticmethod
+    def _move_aside(path):
+        # Keeps every unreadable snapshot: todos.json.corrupt, .corrupt.1, ...
+        target = path + '.corrupt'
+        number = 0
+        while os.path.exists(target):
+            number += 1
+            target = f"{path}.corrupt.{number}"
+        os.replace(path, target)
+        return target
+
+    @staticmethod
+    def _apply(store, entry):
+        op, task_id = entry['op'], entry['id']
+        if op == 'add':
+            if task_id not in store:
+                store.add(entry['text'], False, task_id)
+        elif task_id in store:
+            if op == 'set':
+                store.set(task_id, entry['done'], entry['text'])
+            elif op == 'remove':
+                store.remove(task_id)
+
+    def _record(self, entry):
+        self.seq += 1
+        entry['seq'] = self.seq
+        self.pending.append(json.dumps(entry, ensure_ascii=False))
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def add(self, task_id, text):
+        self._record({'op': 'add', 'id': task_id, 'text': text})
+
+    def set(self, task_id, done, text):
+        self._record({'op': 'set', 'id': task_id, 'done': bool(done), 'text': text})
+
+    def remove(self, task_id):
+        self._record({'op': 'remove', 'id': task_id})
+
+    def flush(self):
+        if self.pending:
+            self._file.write(('\n'.join(self.pending) + '\n').encode('utf-8'))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._journal_ops += len(self.pending)
+            self.pending = []
+        if self._compacted is not None:
+            self._trim()
+
+    def maybe_compact(self, store):
+        if self._compaction is not None or self._journal_ops < max(COMPACT_MIN_OPS, len(store)):
+            return False
+        self.flush()
+        # Captured here so the thread sees a consistent list
+        state = {'seq': self.seq, 'next_id': store.next_id, 'todos': store.records()}
+        offset = self._file.tell()
+
+        def write():
+            _write_atomic(self.path, json.dumps(state, ensure_ascii=False))
+            self._compacted = (state['seq'], offset)
+
+        self._compaction = threading.Thread(target=write, daemon=True)
+        self._compaction.start()
+        return True
+
+    def _trim(self):
+        # The snapshot covers the journal up to `offset`; keep only the rest
+        seq, offset = self._compacted
+        self._file.close()
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        tmp = self.journal_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+        self._file = open(self.journal_path, 'ab')
+        self.snapshot_seq = seq
+        self._journal_ops = tail.count(b'\n')
+        self._compacted = None
+        self._compaction = None
+
+    def close(self):
+        if self._compaction is not None:
+            self._compaction.join()
+        self.flush()
+        self._file.close()
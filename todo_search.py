@@ -0,0 +1,115 @@
+from array import array
+from bisect import bisect_left
+from itertools import compress, repeat
+from operator import contains
+
+GRAM = 3            # index substrings of this length; shorter queries scan the cached texts
+MAX_GRAMS = 4096    # trigram postings kept before the oldest are dropped
+MAX_RUNS = 256      # more separate row changes than this reset the view instead
+
+
+def grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SearchIndex:
+    # Case-insensitive substring search over task texts by store slot. Texts
+    # are lowercased once and kept; removed slots keep an empty text.
+    # Postings (the ascending positions of texts containing a trigram) are
+    # computed the first time a query needs that trigram and kept up to date
+    # afterwards, so loading costs nothing and typing pays one scan per new
+    # trigram. Candidates are always checked against the cached texts, so
+    # stale postings left by edits and removals cost time but never produce
+    # wrong results.
+    def __init__(self, texts=()):
+        self.texts = [text.lower() for text in texts]
+        self.live = bytearray(b'\x01') * len(self.texts)
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _scan(self, needle, positions=None):
+        texts = self.texts
+        if positions is None:
+            return list(compress(range(len(texts)), map(contains, texts, repeat(needle))))
+        return list(compress(positions, map(contains, map(texts.__getitem__, positions), repeat(needle))))
+
+    def _posting(self, gram):
+        posting = self.postings.get(gram)
+        if posting is None:
+            if len(self.postings) >= MAX_GRAMS:
+                del self.postings[next(iter(self.postings))]
+            posting = self.postings[gram] = array('I', self._scan(gram))
+        return posting
+
+    def add(self, text):
+        pos = len(self.texts)
+        text = text.lower()
+        self.texts.append(text)
+        self.live.append(1)
+        for gram in grams(text):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.append(pos)
+        return pos
+
+    def update(self, pos, text):
+        text = text.lower()
+        self.texts[pos] = text
+        for gram in grams(text):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                i = bisect_left(posting, pos)
+                if i == len(posting) or posting[i] != pos:
+                    posting.insert(i, pos)
+
+    def remove(self, pos):
+        # An empty text matches no query; its postings go stale
+        self.texts[pos] = ''
+        self.live[pos] = 0
+
+    def search(self, query, within=None):
+        # Ascending positions whose text contains query. `within` is an earlier
+        # result for a query that this one contains, and only it is rechecked.
+        query = query.lower()
+        if not query:
+            return list(compress(range(len(self.texts)), self.live))
+        if within is not None:
+            return self._scan(query, within)
+        if len(query) < GRAM:
+            return self._scan(query)
+        wanted = grams(query)
+        known = [self.postings[gram] for gram in wanted if gram in self.postings]
+        # The rarest trigram already indexed bounds the candidates; failing
+        # that, index the query's first trigram
+        candidates = min(known, key=len) if known else self._posting(query[:GRAM])
+        return self._scan(query, candidates)
+
+
+def row_changes(old, new, limit=MAX_RUNS):
+    # Turns the ascending row list `old` into `new` as ('remove' | 'insert',
+    # first row, items) steps, each applied to the list the previous step
+    # left. Unchanged rows are never touched. None when it takes more than
+    # `limit` steps, where resetting the view is cheaper.
+    changes = []
+    i = j = row = 0
+    while i < len(old) or j < len(new):
+        if len(changes) > limit:
+            return None
+        if i < len(old) and j < len(new) and old[i] == new[j]:
+            i += 1
+            j += 1
+            row += 1
+        elif j >= len(new) or (i < len(old) and old[i] < new[j]):
+            start = i
+            while i < len(old) and (j >= len(new) or old[i] < new[j]):
+                i += 1
+            changes.append(('remove', row, old[start:i]))
+        else:
+            start = j
+            while j < len(new) and (i >= len(old) or new[j] < old[i]):
+                j += 1
+            changes.append(('insert', row, new[start:j]))
+            row += j - start
+    return changes if len(changes) <= limit else None
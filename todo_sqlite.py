@@ -0,0 +1,111 @@
+import sqlite3
+
+PAGE_SIZE = 500     # rows the model fetches at a time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    done INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL
+);
+"""
+# Substring search through a trigram full-text index kept in step by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    text, content='tasks', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_ad AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_au AFTER UPDATE OF text ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO tasks_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+def _like_pattern(query):
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+class SqliteTodoStore:
+    # Tasks in an SQLite database, read a page at a time in id order. Ids come
+    # from AUTOINCREMENT and are never reused. Queries of three or more
+    # characters go through the FTS5 trigram index; shorter ones, or builds of
+    # SQLite without the trigram tokenizer, use LIKE.
+    def __init__(self, path='todos.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def __contains__(self, task_id):
+        return self.conn.execute('SELECT 1 FROM tasks WHERE id = ?', (task_id,)).fetchone() is not None
+
+    def page(self, query='', after=0, limit=PAGE_SIZE):
+        # Up to `limit` (id, done, text) rows with id > after, in id order
+        if not query:
+            sql = 'SELECT id, done, text FROM tasks WHERE id > ? ORDER BY id LIMIT ?'
+            return self.conn.execute(sql, (after, limit)).fetchall()
+        if self.fts and len(query) >= 3:
+            sql = ('SELECT tasks.id, tasks.done, tasks.text FROM tasks_fts '
+                   'JOIN tasks ON tasks.id = tasks_fts.rowid '
+                   'WHERE tasks_fts MATCH ? AND tasks_fts.rowid > ? ORDER BY tasks_fts.rowid LIMIT ?')
+            return self.conn.execute(sql, (_fts_phrase(query), after, limit)).fetchall()
+        sql = "SELECT id, done, text FROM tasks WHERE text LIKE ? ESCAPE '\\' AND id > ? ORDER BY id LIMIT ?"
+        return self.conn.execute(sql, (_like_pattern(query), after, limit)).fetchall()
+
+    def get(self, task_id):
+        done, text = self.conn.execute('SELECT done, text FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return bool(done), text
+
+    def add(self, text, done=False):
+        return self.conn.execute('INSERT INTO tasks (done, text) VALUES (?, ?)', (int(done), text)).lastrowid
+
+    def set(self, task_id, done, text):
+        self.conn.execute('UPDATE tasks SET done = ?, text = ? WHERE id = ?', (int(done), text, task_id))
+
+    def remove(self, task_id):
+        self.conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+
+    def import_records(self, records):
+        # (done, text, id) tuples, e.g. TodoStore.records() from todos.json.
+        # Rebuilding the full-text index once is several times faster than
+        # letting the insert trigger index row by row.
+        if self.fts:
+            self.conn.execute('DROP TRIGGER tasks_ai')
+        self.conn.executemany('INSERT INTO tasks (done, text, id) VALUES (?, ?, ?)',
+                              ((int(done), text, task_id) for done, text, task_id in records))
+        if self.fts:
+            self.conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+            self.conn.executescript(FTS_SCHEMA)
+        self.flush()
+
+    def flush(self):
+        # Changes since the last flush become durable together
+        self.conn.commit()
+
+    def maybe_compact(self, store):
+        # SQLite manages its own files; nothing to do
+        return False
+
+    def close(self):
+        self.flush()
+        self.conn.close()
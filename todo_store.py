@@ -0,0 +1,79 @@
+from array import array
+
+COMPACT_MIN = 1024      # removed slots tolerated before compaction is considered
+
+
+class TodoStore:
+    # Tasks in parallel arrays indexed by slot, in the order they were added.
+    # Every task gets an id that never changes or gets reused, and a dict maps
+    # ids to slots, so reaching a task is O(1) whatever its text. Removing a
+    # task leaves a tombstone (id 0) until compact() squeezes them out.
+    def __init__(self, todos=()):
+        self.ids = array('Q')
+        self.done = bytearray()
+        self.texts = []
+        self.slot_of = {}
+        self.next_id = 1
+        for status, text in todos:
+            self.add(text, status)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def __contains__(self, task_id):
+        return task_id in self.slot_of
+
+    def __iter__(self):
+        # Live ids in order
+        return (task_id for task_id in self.ids if task_id)
+
+    def add(self, text, done=False, task_id=None):
+        # task_id restores a saved task; new tasks take the next unused id
+        if task_id is None:
+            task_id = self.next_id
+        self.next_id = max(self.next_id, task_id + 1)
+        self.slot_of[task_id] = len(self.ids)
+        self.ids.append(task_id)
+        self.done.append(bool(done))
+        self.texts.append(text)
+        return task_id
+
+    def get(self, task_id):
+        slot = self.slot_of[task_id]
+        return bool(self.done[slot]), self.texts[slot]
+
+    def set(self, task_id, done, text):
+        slot = self.slot_of[task_id]
+        self.done[slot] = bool(done)
+        self.texts[slot] = text
+
+    def remove(self, task_id):
+        slot = self.slot_of.pop(task_id)
+        self.ids[slot] = 0
+        self.texts[slot] = ''
+        return slot
+
+    def records(self):
+        # (done, text, id) of live tasks in order
+        return [(bool(done), text, task_id) for task_id, done, text in zip(self.ids, self.done, self.texts) if task_id]
+
+    def wasted(self):
+        return len(self.ids) - len(self.slot_of)
+
+    def needs_compaction(self):
+        wasted = self.wasted()
+        return wasted > COMPACT_MIN and wasted > len(self.slot_of)
+
+    def compact(self):
+        # Drops tombstones; returns the new slot of every old slot (-1 if removed)
+        moved = array('q', [-1]) * len(self.ids)
+        ids, done, texts = array('Q'), bytearray(), []
+        for slot, task_id in enumerate(self.ids):
+            if task_id:
+                moved[slot] = len(ids)
+                self.slot_of[task_id] = len(ids)
+                ids.append(task_id)
+                done.append(self.done[slot])
+                texts.append(self.texts[slot])
+        self.ids, self.done, self.texts = ids, done, texts
+        return moved